@@ -1,5 +1,6 @@
 import boto3
 import json
+from bedrock_metrics import instrument, print_summary
 
 # Configuration - UPDATE THESE VALUES
 AGENT_ID = "YOUR_AGENT_ID"  # Replace with your Agent ID
@@ -7,7 +8,7 @@ AGENT_ALIAS_ID = "YOUR_ALIAS_ID"  # Replace with your Agent Alias ID (often "TST
 AWS_REGION = "us-east-1"  # Replace with your region
 
 # Initialize the client
-client = boto3.client('bedrock-agent-runtime', region_name=AWS_REGION)
+client = instrument(boto3.client('bedrock-agent-runtime', region_name=AWS_REGION), rubric="agent")
 
 # Your prompt to the agent
 
@@ -17,7 +18,8 @@ response = client.invoke_agent(
     agentId="ZEHFOMDDKA",
     agentAliasId="JCKPINXRX7",
     sessionId='session-123',  # Can be any unique string for conversation continuity
-    inputText=prompt
+    inputText=prompt,
+    enableTrace=True  # Trace events carry the token usage the metrics summary reports
 )
 
 # Process and print the streaming response
@@ -32,4 +34,7 @@ for event in response['completion']:
         if 'bytes' in chunk:
             response_text += chunk['bytes'].decode('utf-8')
 
-print(response_text)
\ No newline at end of file
+print(response_text)
+
+print("\nUsage:")
+print_summary()
\ No newline at end of file
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Token, cost and latency accounting for Bedrock calls.
+
+Wrap any boto3 bedrock-runtime or bedrock-agent-runtime client with
+instrument(); invoke_model, converse and invoke_agent calls are then recorded
+with input/output tokens, time-to-first-byte, total latency, retries, parse
+failures and estimated cost. Each record is tagged with the rubric and a short
+hash of the prompt text, so two prompt versions can be compared side by side.
+The record is attached to the response as response["MetricsRecord"]; pass it
+to mark_parse_failure() when the model output can't be parsed.
+
+invoke_agent calls default to enableTrace=True, since the trace events are the
+only place Bedrock reports an agent's token usage and the foundation model(s)
+it ran; cost is priced per foundation model. converse returns all at once, so
+its records have no time-to-first-byte.
+
+Records are kept in a rolling in-memory window (summary() / print_summary()).
+When BEDROCK_METRICS_FILE is set they are also appended to that JSONL file.
+Summarize a dump with:
+
+    python bedrock_metrics.py metrics.jsonl [--by prompt_version,model]
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+ROLLING_WINDOW = 1000
+METRICS_FILE = os.environ.get('BEDROCK_METRICS_FILE')
+
+# USD per 1,000 tokens (input, output), on-demand us-east-1
+MODEL_PRICES = {
+    "amazon.nova-micro-v1:0": (0.000035, 0.00014),
+    "amazon.nova-lite-v1:0": (0.00006, 0.00024),
+    "amazon.nova-pro-v1:0": (0.0008, 0.0032),
+}
+
+
+def prompt_version(prompt_text):
+    """Short stable id for a prompt, e.g. 'p-3fa2c1d0'."""
+    return "p-" + hashlib.sha256(prompt_text.strip().encode('utf-8')).hexdigest()[:8]
+
+
+def _price_key(model):
+    """MODEL_PRICES key for a model id, ARN or cross-region profile (us.amazon.nova-...)."""
+    model = (model or "").rsplit("/", 1)[-1]
+    prefix, _, rest = model.partition(".")
+    if prefix in ("us", "eu", "apac") and rest:
+        return rest
+    return model
+
+
+def estimate_cost(model, input_tokens, output_tokens):
+    prices = MODEL_PRICES.get(_price_key(model))
+    if prices is None or input_tokens is None or output_tokens is None:
+        return None
+    return round(input_tokens / 1000 * prices[0] + output_tokens / 1000 * prices[1], 8)
+
+
+class MetricsRegistry:
+    """Thread-safe rolling store of call records."""
+
+    def __init__(self, window=ROLLING_WINDOW, path=METRICS_FILE):
+        self.records = deque(maxlen=window)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def finish(self, record):
+        """Called once a record's latency and usage are final."""
+        usage_by_model = record.get("usage_by_model")
+        if usage_by_model:
+            # Agents: price each foundation model the trace reported
+            costs = [estimate_cost(model, tokens[0], tokens[1]) for model, tokens in usage_by_model.items()]
+            record["cost_usd"] = round(sum(costs), 8) if None not in costs else None
+        else:
+            record["cost_usd"] = estimate_cost(record["model"], record["input_tokens"], record["output_tokens"])
+        if self.path:
+            with self._lock, open(self.path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+
+    def mark_parse_failure(self, record):
+        """Flag the call behind record as unparseable; None (uninstrumented call) is ignored."""
+        if record is None:
+            return
+        record["parse_failure"] = True
+        if self.path:
+            with self._lock, open(self.path, 'a') as f:
+                f.write(json.dumps({"parse_failure_for": record["id"]}) + "\n")
+
+    def summary(self, group_by=("operation", "model", "rubric", "prompt_version")):
+        with self._lock:
+            records = list(self.records)
+        return summarize(records, group_by)
+
+
+registry = MetricsRegistry()
+_tags = threading.local()
+
+
+@contextlib.contextmanager
+def tags(**extra):
+    """Add tags (e.g. rubric=..., prompt_version=...) to calls made inside the block."""
+    previous = getattr(_tags, 'current', {})
+    _tags.current = {**previous, **extra}
+    try:
+        yield
+    finally:
+        _tags.current = previous
+
+
+def mark_parse_failure(record):
+    registry.mark_parse_failure(record)
+
+
+def record_for(response):
+    """The metrics record attached to an instrumented client's response, or None."""
+    return response.get("MetricsRecord") if isinstance(response, dict) else None
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return round(values[index], 1)
+
+
+def summarize(records, group_by=("operation", "model", "rubric", "prompt_version")):
+    """Aggregate records into per-group counts, token averages, cost and latency percentiles."""
+    failures = {r["parse_failure_for"] for r in records if "parse_failure_for" in r}
+    groups = {}
+    for record in records:
+        if "parse_failure_for" in record:
+            continue
+        key = " / ".join(str(record.get(field)) for field in group_by)
+        groups.setdefault(key, []).append(record)
+
+    summary = {}
+    for key, group in groups.items():
+        input_tokens = [r["input_tokens"] for r in group if r["input_tokens"] is not None]
+        output_tokens = [r["output_tokens"] for r in group if r["output_tokens"] is not None]
+        costs = [r["cost_usd"] for r in group if r.get("cost_usd") is not None]
+        summary[key] = {
+            "calls": len(group),
+            "errors": sum(1 for r in group if r.get("error")),
+            "parse_failures": sum(1 for r in group if r.get("parse_failure") or r["id"] in failures),
+            "retries": sum(r.get("retries") or 0 for r in group),
+            "avg_input_tokens": round(sum(input_tokens) / len(input_tokens), 1) if input_tokens else None,
+            "avg_output_tokens": round(sum(output_tokens) / len(output_tokens), 1) if output_tokens else None,
+            "total_cost_usd": round(sum(costs), 6) if costs else None,
+            "ttfb_p50_ms": _percentile([r["ttfb_ms"] for r in group if r.get("ttfb_ms") is not None], 50),
+            "latency_p50_ms": _percentile([r["latency_ms"] for r in group if r.get("latency_ms") is not None], 50),
+            "latency_p95_ms": _percentile([r["latency_ms"] for r in group if r.get("latency_ms") is not None], 95),
+        }
+    return summary
+
+
+def print_summary(summary=None, out=sys.stdout):
+    summary = registry.summary() if summary is None else summary
+    if not summary:
+        print("No Bedrock calls recorded", file=out)
+        return
+    for key, row in summary.items():
+        cost = f"${row['total_cost_usd']:.6f}" if row["total_cost_usd"] is not None else "n/a"
+        print(f"{key}", file=out)
+        print(
+            f"  calls {row['calls']}, errors {row['errors']}, parse failures {row['parse_failures']}, "
+            f"retries {row['retries']}", file=out
+        )
+        print(
+            f"  tokens in/out {row['avg_input_tokens']}/{row['avg_output_tokens']} avg, cost {cost}", file=out
+        )
+        print(
+            f"  ttfb p50 {row['ttfb_p50_ms']} ms, latency p50 {row['latency_p50_ms']} ms, "
+            f"p95 {row['latency_p95_ms']} ms", file=out
+        )
+
+
+class _TimedBody:
+    """Wraps invoke_model's StreamingBody to finish the record once it's fully read."""
+
+    def __init__(self, body, record, started):
+        self._body = body
+        self._record = record
+        self._started = started
+        self._buffer = bytearray()
+        self._done = False
+
+    def read(self, amt=None):
+        data = self._body.read(amt)
+        if not self._done:
+            self._buffer += data
+            # read() with no size, or an empty read, means the body is exhausted
+            if amt is None or not data:
+                self._finish()
+        return data
+
+    def iter_chunks(self, chunk_size=1024):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def __iter__(self):
+        return self.iter_chunks()
+
+    def _finish(self):
+        self._done = True
+        self._record["latency_ms"] = round((time.perf_counter() - self._started) * 1000, 1)
+        try:
+            usage = json.loads(bytes(self._buffer)).get("usage", {})
+            self._record["input_tokens"] = usage.get("inputTokens")
+            self._record["output_tokens"] = usage.get("outputTokens")
+        except (ValueError, AttributeError):
+            pass
+        self._buffer = None
+        registry.finish(self._record)
+
+    def __getattr__(self, name):
+        return getattr(self._body, name)
+
+
+class _TimedCompletion:
+    """Wraps invoke_agent's event stream to time the first and last chunk and tally trace usage."""
+
+    def __init__(self, stream, record, started):
+        self._stream = stream
+        self._record = record
+        self._started = started
+        self._model = None  # foundation model of the invocation in progress
+
+    def _observe_trace(self, trace):
+        # Pre-processing, orchestration, post-processing etc. each report the
+        # model they invoke, then that invocation's usage in a later event
+        record = self._record
+        for step in trace.values():
+            if not isinstance(step, dict):
+                continue
+            model = step.get("modelInvocationInput", {}).get("foundationModel")
+            if model:
+                self._model = model
+            usage = step.get("modelInvocationOutput", {}).get("metadata", {}).get("usage")
+            if usage:
+                input_tokens = usage.get("inputTokens", 0)
+                output_tokens = usage.get("outputTokens", 0)
+                record["input_tokens"] = (record["input_tokens"] or 0) + input_tokens
+                record["output_tokens"] = (record["output_tokens"] or 0) + output_tokens
+                tokens = record.setdefault("usage_by_model", {}).setdefault(self._model, [0, 0])
+                tokens[0] += input_tokens
+                tokens[1] += output_tokens
+
+    def __iter__(self):
+        record = self._record
+        try:
+            for event in self._stream:
+                if "chunk" in event and record["ttfb_ms"] is None:
+                    record["ttfb_ms"] = round((time.perf_counter() - self._started) * 1000, 1)
+                trace = event.get("trace", {}).get("trace")
+                if isinstance(trace, dict):
+                    self._observe_trace(trace)
+                yield event
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["latency_ms"] = round((time.perf_counter() - self._started) * 1000, 1)
+            registry.finish(record)
+
+
+class InstrumentedClient:
+    """Proxy for a boto3 Bedrock client that records every model/agent call."""
+
+    _counter = 0
+    _counter_lock = threading.Lock()
+
+    def __init__(self, client, **default_tags):
+        self._client = client
+        self._default_tags = default_tags
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _new_record(self, operation, model):
+        with InstrumentedClient._counter_lock:
+            InstrumentedClient._counter += 1
+            call_id = f"{os.getpid()}-{InstrumentedClient._counter}"
+        record = {
+            "id": call_id,
+            "timestamp": time.time(),
+            "operation": operation,
+            "model": model,
+            "rubric": None,
+            "prompt_version": None,
+            "input_tokens": None,
+            "output_tokens": None,
+            "ttfb_ms": None,
+            "latency_ms": None,
+            "retries": 0,
+            "parse_failure": False,
+            "error": None,
+        }
+        record.update(self._default_tags)
+        record.update(getattr(_tags, 'current', {}))
+        registry.add(record)
+        return record
+
+    def _call(self, operation, model, method, kwargs):
+        record = self._new_record(operation, model)
+        started = time.perf_counter()
+        try:
+            response = method(**kwargs)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            record["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            registry.finish(record)
+            raise
+        record["ttfb_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        record["retries"] = response.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        response["MetricsRecord"] = record
+        return record, started, response
+
+    def invoke_model(self, **kwargs):
+        record, started, response = self._call("invoke_model", kwargs.get("modelId"), self._client.invoke_model, kwargs)
+        response["body"] = _TimedBody(response["body"], record, started)
+        return response
+
+    def converse(self, **kwargs):
+        record, started, response = self._call("converse", kwargs.get("modelId"), self._client.converse, kwargs)
+        usage = response.get("usage", {})
+        record["input_tokens"] = usage.get("inputTokens")
+        record["output_tokens"] = usage.get("outputTokens")
+        # The whole response arrives at once, so there is no separate first byte
+        record["latency_ms"] = record["ttfb_ms"]
+        record["ttfb_ms"] = None
+        registry.finish(record)
+        return response
+
+    def invoke_agent(self, **kwargs):
+        # Usage and the foundation model only come through trace events
+        kwargs.setdefault("enableTrace", True)
+        model = f"agent:{kwargs.get('agentId')}/{kwargs.get('agentAliasId')}"
+        record, started, response = self._call("invoke_agent", model, self._client.invoke_agent, kwargs)
+        response["completion"] = _TimedCompletion(response["completion"], record, started)
+        return response
+
+
+def instrument(client, **default_tags):
+    """Wrap a boto3 Bedrock client; default_tags (rubric=, prompt_version=) apply to every call."""
+    if isinstance(client, InstrumentedClient):
+        return client
+    return InstrumentedClient(client, **default_tags)
+
+
+def load_dump(path):
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python bedrock_metrics.py <metrics.jsonl> [--by field1,field2]")
+        sys.exit(1)
+
+    group_by = ("operation", "model", "rubric", "prompt_version")
+    if "--by" in sys.argv:
+        group_by = tuple(sys.argv[sys.argv.index("--by") + 1].split(","))
+
+    print_summary(summarize(load_dump(sys.argv[1]), group_by))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Compare single-item and packed grading against a local stub model.
+
+The stub answers like Nova: it reads the transcripts out of the prompt, returns
+one JSON object (single mode) or a JSON array (packed mode), reports token
+usage, and sleeps for a latency modelled as
+    base + input_tokens * per_input + output_tokens * per_output.
+It can drop or corrupt a fraction of packed items to exercise re-grading.
+
+Usage:
+    python benchmark_packed.py [--transcripts 60] [--fail-rate 0.05]
+        [--time-scale 0.05] [--prompt-file PATH]
+
+Sleeps are multiplied by --time-scale to keep runs short; reported times are
+scaled back to model time. The system prompt defaults to grade_pitch's
+SYSTEM_PROMPT, the rubric whose JSON shape RESULT_KEYS checks.
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+
+from packed_grading import PackedGrader, RESULT_KEYS, estimate_tokens, is_valid_result
+
+TOPICS = [
+    ("College students struggle with time management.", "I built an app that organizes all assignments.", "It helps students stay on track and reduce stress."),
+    ("Traffic congestion costs people hours daily.", "Our app finds optimal routes using real-time data.", "Users save 30 minutes per commute."),
+    ("At my work we had to manually input sales info into our system.", "I created a script that inputs the data automatically.", "It saves 10 hours per week."),
+    ("Small restaurants waste a lot of food every night.", "We built a platform that sells leftovers at a discount.", "Owners recover 15 percent of food costs."),
+]
+
+
+class StubModel:
+    def __init__(self, base_ms, input_ms_per_token, output_ms_per_token, fail_rate, time_scale, seed=7):
+        self.base_ms = base_ms
+        self.input_ms_per_token = input_ms_per_token
+        self.output_ms_per_token = output_ms_per_token
+        self.fail_rate = fail_rate
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+
+    def _grade(self, transcript):
+        words = len(transcript.split())
+        score = 3 if words > 15 else 1
+        return {
+            **{key: score for key in RESULT_KEYS[:-1]},
+            "total_score": score * (len(RESULT_KEYS) - 1),
+            "reasoning_for_each_category": {
+                name: f"The {name.replace('_', ' ')} is {'clear and specific' if score == 3 else 'missing or vague'} in this {words}-word pitch."
+                for name in ("problem_clarity", "solution_clarity", "benefit", "structure", "tone")
+            },
+        }
+
+    def __call__(self, prompt_text, max_tokens):
+        packed = re.findall(r'<transcript id="([^"]+)">\n(.*?)\n</transcript>', prompt_text, re.S)
+
+        if packed:
+            items = []
+            for item_id, transcript in packed:
+                roll = self.rng.random()
+                if roll < self.fail_rate / 2:
+                    continue  # dropped item
+                entry = {"id": item_id, **self._grade(transcript)}
+                if roll < self.fail_rate:
+                    entry.pop("benefit_score")  # malformed item
+                items.append(entry)
+            raw_text = json.dumps(items)
+        else:
+            transcript = prompt_text.split("Here is the transcript to grade:\n", 1)[1].split("\n</user>")[0]
+            raw_text = json.dumps(self._grade(transcript))
+
+        usage = {"inputTokens": estimate_tokens(prompt_text), "outputTokens": estimate_tokens(raw_text)}
+        latency_ms = (self.base_ms + usage["inputTokens"] * self.input_ms_per_token
+                      + usage["outputTokens"] * self.output_ms_per_token)
+        time.sleep(latency_ms / 1000 * self.time_scale)
+        return raw_text, usage, None
+
+
+def make_corpus(count, seed=11):
+    rng = random.Random(seed)
+    corpus = {}
+    for i in range(count):
+        problem, solution, benefit = rng.choice(TOPICS)
+        corpus[f"sub-{i:04d}"] = f"{problem} {solution} {benefit}"
+    return corpus
+
+
+def run(label, grader, corpus, time_scale):
+    start = time.perf_counter()
+    results = grader.grade_many(corpus)
+    model_seconds = (time.perf_counter() - start) / time_scale
+
+    stats = grader.stats
+    valid = sum(1 for result in results.values() if is_valid_result(result))
+    tokens = stats["input_tokens"] + stats["output_tokens"]
+    n = len(corpus)
+    print(
+        f"{label:<8} {stats['packed_calls'] + stats['single_calls']:>6} "
+        f"{stats['input_tokens'] / n:>10.0f} {stats['output_tokens'] / n:>10.0f} {tokens / n:>10.0f} "
+        f"{model_seconds / n * 1000:>9.0f} {stats['regraded']:>8} {valid:>5}/{n}"
+    )
+    return tokens / n, model_seconds / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark packed vs single-item grading on a stub model")
+    parser.add_argument('--transcripts', type=int, default=60)
+    parser.add_argument('--fail-rate', type=float, default=0.05, help='fraction of packed items dropped or malformed')
+    parser.add_argument('--base-ms', type=float, default=400)
+    parser.add_argument('--input-ms', type=float, default=0.02, help='ms per input token')
+    parser.add_argument('--output-ms', type=float, default=5, help='ms per output token')
+    parser.add_argument('--time-scale', type=float, default=0.05)
+    parser.add_argument('--prompt-file', help='grade with this system prompt instead of grade_pitch.SYSTEM_PROMPT')
+    args = parser.parse_args()
+
+    if args.prompt_file:
+        with open(args.prompt_file, 'r') as f:
+            system_prompt = f.read().strip()
+    else:
+        from grade_pitch import SYSTEM_PROMPT
+        system_prompt = SYSTEM_PROMPT.strip()
+
+    corpus = make_corpus(args.transcripts)
+    print(f"{args.transcripts} transcripts, system prompt ~{estimate_tokens(system_prompt)} tokens, "
+          f"fail rate {args.fail_rate:.0%}")
+    print(f"{'mode':<8} {'calls':>6} {'in tok/t':>10} {'out tok/t':>10} {'tok/t':>10} {'ms/t':>9} {'regraded':>8} {'valid':>9}")
+    print("-" * 78)
+
+    def stub():
+        return StubModel(args.base_ms, args.input_ms, args.output_ms, args.fail_rate, args.time_scale)
+
+    single = PackedGrader(invoke=stub(), system_prompt=system_prompt, max_pack_size=1, use_pregrade=False)
+    packed = PackedGrader(invoke=stub(), system_prompt=system_prompt, use_pregrade=False)
+
+    single_tokens, single_seconds = run("single", single, corpus, args.time_scale)
+    packed_tokens, packed_seconds = run("packed", packed, corpus, args.time_scale)
+
+    print("-" * 78)
+    print(f"packed uses {packed_tokens / single_tokens:.0%} of the tokens and "
+          f"{packed_seconds / single_seconds:.0%} of the wall-clock per transcript")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Admission control for the analysis service
+Coalesces concurrent requests for the same video into one in-flight analysis,
+skips or aborts work whose callers' deadlines can no longer be met, and sheds
+load once every analysis slot and queue position is taken.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+
+class Overloaded(Exception):
+    """Raised when the service is saturated and refuses new work."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passed or cannot be met."""
+
+
+class _InFlight:
+    """One running analysis shared by every request for the same key."""
+
+    def __init__(self, deadline):
+        self.future = Future()
+        self.deadline = deadline
+
+    def extend(self, deadline):
+        # Keep working as long as the most patient caller is still waiting
+        if self.deadline is None or deadline is None:
+            self.deadline = None
+        else:
+            self.deadline = max(self.deadline, deadline)
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+
+class AnalysisCoordinator:
+    """
+    Runs analyses with per-key coalescing and deadline-aware admission.
+
+    Deadlines are absolute time.monotonic() values, or None for no deadline.
+    Run-time estimates are kept per estimate_key (e.g. the analysis profile).
+    """
+
+    ACQUIRE_POLL = 0.25  # seconds between deadline checks while queued
+
+    def __init__(self, max_concurrent=2, max_queued=4, smoothing=0.3):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.smoothing = smoothing
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._inflight = {}
+        self._admitted = 0
+        self._estimates = {}  # estimate_key -> moving average of run seconds
+        self._stats = {
+            "started": 0,
+            "coalesced": 0,
+            "shed": 0,
+            "skipped_deadline": 0,
+            "aborted_deadline": 0
+        }
+
+    def estimated_seconds(self, estimate_key=None):
+        """Estimated run time for estimate_key (mean of all keys if None), None if unknown."""
+        with self._lock:
+            if estimate_key is not None:
+                return self._estimates.get(estimate_key)
+            values = list(self._estimates.values())
+            return sum(values) / len(values) if values else None
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self._stats,
+                in_flight=len(self._inflight),
+                admitted=self._admitted,
+                estimated_seconds={str(k): round(v, 2) for k, v in self._estimates.items()}
+            )
+
+    def run(self, key, work, deadline=None, estimate_key=None):
+        """
+        Run work(should_abort) for key, or wait on the analysis already running.
+
+        should_abort() turns True once every caller's deadline has passed, so
+        long-running work can stop early. estimate_key groups runs of similar
+        cost for the queue-wait estimate. Raises Overloaded or DeadlineExceeded.
+        """
+        with self._lock:
+            entry = self._inflight.get(key)
+            if entry is not None:
+                entry.extend(deadline)
+                self._stats["coalesced"] += 1
+                is_leader = False
+            else:
+                self._admit(deadline, estimate_key)
+                entry = _InFlight(deadline)
+                self._inflight[key] = entry
+                self._admitted += 1
+                is_leader = True
+
+        if is_leader:
+            self._lead(key, entry, work, estimate_key)
+
+        return self._wait(entry, deadline)
+
+    def _admit(self, deadline, estimate_key):
+        """Reject new work up front. Caller must hold self._lock."""
+        if self._admitted >= self.max_concurrent + self.max_queued:
+            self._stats["shed"] += 1
+            raise Overloaded("Analysis service is at capacity, retry later")
+
+        if deadline is None:
+            return
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._stats["skipped_deadline"] += 1
+            raise DeadlineExceeded("Deadline already passed")
+
+        # A free slot means the work starts now; a run that overruns is
+        # aborted by should_abort, so only queued work is judged up front
+        if self._admitted < self.max_concurrent:
+            return
+
+        run_seconds = self._estimates.get(estimate_key)
+        if run_seconds is None:
+            return
+
+        # Each queued item ahead of us (plus ours) waits for one run per slot
+        queued_ahead = self._admitted - self.max_concurrent + 1
+        estimate = run_seconds * queued_ahead / self.max_concurrent + run_seconds
+        if estimate > remaining:
+            self._stats["skipped_deadline"] += 1
+            raise DeadlineExceeded(
+                f"Deadline in {remaining:.1f}s cannot be met "
+                f"(estimated {estimate:.1f}s including queue wait)"
+            )
+
+    def _lead(self, key, entry, work, estimate_key):
+        """Acquire a slot, run the analysis and publish the outcome to all waiters."""
+        acquired = False
+        try:
+            # Poll so a more patient caller joining while we're queued
+            # (entry.extend) keeps us waiting instead of timing out early
+            while not acquired:
+                if entry.expired():
+                    raise DeadlineExceeded("Deadline passed while queued for an analysis slot")
+                acquired = self._slots.acquire(timeout=self.ACQUIRE_POLL)
+            if entry.expired():
+                raise DeadlineExceeded("Deadline passed while queued for an analysis slot")
+
+            with self._lock:
+                self._stats["started"] += 1
+
+            start = time.monotonic()
+            result = work(entry.expired)
+            self._record_duration(estimate_key, time.monotonic() - start)
+            outcome = (result, None)
+
+        except DeadlineExceeded as e:
+            outcome = (None, e)
+        except Exception as e:
+            if entry.expired():
+                with self._lock:
+                    self._stats["aborted_deadline"] += 1
+                e = DeadlineExceeded(f"Analysis aborted after deadline: {e}")
+            outcome = (None, e)
+
+        finally:
+            if acquired:
+                self._slots.release()
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._admitted -= 1
+
+        result, error = outcome
+        if error is not None:
+            entry.future.set_exception(error)
+        else:
+            entry.future.set_result(result)
+
+    def _wait(self, entry, deadline):
+        timeout = None
+        if deadline is not None:
+            timeout = max(0, deadline - time.monotonic())
+        try:
+            return entry.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise DeadlineExceeded("Deadline passed while waiting for shared analysis")
+
+    def _record_duration(self, estimate_key, seconds):
+        with self._lock:
+            current = self._estimates.get(estimate_key)
+            if current is not None:
+                seconds = current + self.smoothing * (seconds - current)
+            self._estimates[estimate_key] = seconds
@@ -5,20 +5,135 @@ Provides HTTP endpoint for the Supabase Edge Function to call
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from video_hand_analyzer import analyze_video_hands, download_video
+from video_hand_analyzer import analyze_video_hands, download_video, get_profile, DEFAULT_PROFILE, AnalysisAborted
+from admission import AnalysisCoordinator, Overloaded, DeadlineExceeded
+from collections import OrderedDict
 import tempfile
+import threading
+import time
 import os
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Concurrent analyses share one coordinator: duplicate video_url requests join
+# the running analysis, and work is shed once slots and queue are full.
+coordinator = AnalysisCoordinator(
+    max_concurrent=int(os.environ.get('MAX_CONCURRENT_ANALYSES', 2)),
+    max_queued=int(os.environ.get('MAX_QUEUED_ANALYSES', 4))
+)
+
+
+# Results that include keyframe previews are kept so teachers reopening a
+# submission don't trigger a second decode of the video.
+PREVIEW_CACHE_SIZE = int(os.environ.get('PREVIEW_CACHE_SIZE', 64))
+PREVIEW_CACHE_TTL = int(os.environ.get('PREVIEW_CACHE_TTL', 3600))  # seconds
+preview_cache = OrderedDict()
+preview_cache_lock = threading.Lock()
+
+
+def get_cached_previews(key):
+    """Return a cached result with previews for key, or None."""
+    with preview_cache_lock:
+        entry = preview_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > PREVIEW_CACHE_TTL:
+            del preview_cache[key]
+            return None
+        preview_cache.move_to_end(key)
+        return result
+
+
+def cache_previews(key, result):
+    with preview_cache_lock:
+        preview_cache[key] = (time.monotonic(), result)
+        preview_cache.move_to_end(key)
+        while len(preview_cache) > PREVIEW_CACHE_SIZE:
+            preview_cache.popitem(last=False)
+
+
+# Keys whose next coalesced run should build previews. A previews request that
+# joins a run still waiting for a slot upgrades it instead of starting its own.
+pending_previews = set()
+pending_previews_lock = threading.Lock()
+
+
+def without_previews(result):
+    return {k: v for k, v in result.items() if k not in ('previews', 'preview_overhead_ms')}
+
+
+class DownloadFailed(Exception):
+    """Raised when the submission video could not be fetched."""
+
+
+def run_analysis(video_url, profile, should_abort, previews=False):
+    """Download (if needed) and analyze one video, cleaning up the temp file."""
+    is_url = video_url.startswith(('http://', 'https://'))
+    temp_path = None
+
+    try:
+        if is_url:
+            # Download video to temp file
+            with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as temp_file:
+                temp_path = temp_file.name
+
+            print(f"Downloading video to: {temp_path}")
+            if not download_video(video_url, temp_path):
+                raise DownloadFailed("Failed to download video")
+
+            # Downloads can't be interrupted, so re-check before analyzing
+            if should_abort():
+                raise AnalysisAborted("Deadline passed during download")
+
+            video_path = temp_path
+        else:
+            video_path = video_url
+
+        # Analyze video
+        return analyze_video_hands(
+            video_path, profile=profile, should_abort=should_abort, previews=previews
+        )
+
+    finally:
+        # Clean up temp file
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def error_payload(message):
+    return {
+        "error": message,
+        "used_hands_effectively": False,
+        "hands_detected": False,
+        "movement_detected": False,
+        "details": f"Error: {message}"
+    }
+
+def analyze_shared(cache_key, video_url, profile, previews, deadline):
+    """Run or join the one analysis of cache_key, building previews if any caller wants them."""
+    if previews:
+        with pending_previews_lock:
+            pending_previews.add(cache_key)
+
+    def work(should_abort):
+        with pending_previews_lock:
+            build = cache_key in pending_previews
+            pending_previews.discard(cache_key)
+        return run_analysis(video_url, profile, should_abort, build)
+
+    return coordinator.run(cache_key, work, deadline=deadline, estimate_key=cache_key[1])
+
+
 @app.route('/', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         "status": "ok",
         "service": "hand-tracking-analysis",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "admission": coordinator.stats()
     })
 
 @app.route('/analyze', methods=['POST'])
@@ -28,16 +143,30 @@ def analyze():
 
     Request body:
     {
-        "video_url": "https://..."
+        "video_url": "https://...",
+        "profile": "fast" | "balanced" | "accurate",   (optional)
+        "deadline_ms": 55000,                           (optional)
+        "previews": true                                (optional)
     }
 
+    deadline_ms is how long the caller is willing to wait. Requests that
+    cannot finish in time get 504 without (or partway through) analysis,
+    and a saturated service answers 503 with Retry-After instead of queuing.
+    Concurrent requests for the same video_url and profile share one analysis,
+    with or without previews. With previews, annotated JPEG keyframes are
+    returned under "previews" and the result is cached for repeat requests.
+
     Response:
     {
         "used_hands_effectively": true/false,
         "hands_detected": true/false,
         "movement_detected": true/false,
         "details": "...",
-        "frames_processed": 123
+        "frames_processed": 123,
+        "profile": "accurate",
+        "previews": [{"label": "peak_movement", "timestamp": 3.5,
+                      "width": 320, "height": 180,
+                      "image": "data:image/jpeg;base64,..."}]   (only with previews)
     }
     """
     try:
@@ -51,47 +180,66 @@ def analyze():
         if not video_url:
             return jsonify({"error": "video_url is required"}), 400
 
-        print(f"Analyzing video: {video_url}")
+        profile = data.get('profile')
+        try:
+            get_profile(profile)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        # Check if it's a URL or local file
-        is_url = video_url.startswith(('http://', 'https://'))
+        deadline = None
+        deadline_ms = data.get('deadline_ms')
+        if deadline_ms is not None:
+            try:
+                deadline = time.monotonic() + float(deadline_ms) / 1000
+            except (TypeError, ValueError):
+                return jsonify({"error": "deadline_ms must be a number"}), 400
 
-        if is_url:
-            # Download video to temp file
-            with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as temp_file:
-                temp_path = temp_file.name
+        print(f"Analyzing video: {video_url} (profile: {profile or 'default'}, deadline_ms: {deadline_ms})")
 
-            print(f"Downloading video to: {temp_path}")
-            if not download_video(video_url, temp_path):
-                return jsonify({"error": "Failed to download video"}), 500
+        previews = data.get('previews', False)
+        if not isinstance(previews, bool):
+            return jsonify({"error": "previews must be true or false"}), 400
 
-            video_path = temp_path
-        else:
-            video_path = video_url
+        cache_key = (video_url, profile or DEFAULT_PROFILE)
 
-        # Analyze video
-        result = analyze_video_hands(video_path)
+        # A cached previews result answers plain requests too
+        cached = get_cached_previews(cache_key)
+        if cached is not None:
+            print(f"Serving cached result for: {video_url}")
+            return jsonify(cached if previews else without_previews(cached)), 200
 
-        print(f"Analysis complete: {result}")
+        result = analyze_shared(cache_key, video_url, profile, previews, deadline)
+        if previews and "previews" not in result:
+            # Joined a plain run that had already started; build them now
+            result = analyze_shared(cache_key, video_url, profile, previews, deadline)
 
-        # Clean up temp file
-        if is_url and os.path.exists(temp_path):
-            os.remove(temp_path)
+        if "previews" in result:
+            cache_previews(cache_key, result)
+            if not previews:
+                result = without_previews(result)
+
+        print(f"Analysis complete: {result.get('details')} ({result.get('frames_processed')} frames)")
 
         return jsonify(result), 200
 
+    except Overloaded as e:
+        print(f"Shedding request: {e}")
+        estimate = coordinator.estimated_seconds() or 1
+        return jsonify(error_payload(str(e))), 503, {"Retry-After": str(max(1, round(estimate)))}
+
+    except DeadlineExceeded as e:
+        print(f"Deadline exceeded: {e}")
+        return jsonify(error_payload(str(e))), 504
+
+    except DownloadFailed as e:
+        return jsonify({"error": str(e)}), 500
+
     except Exception as e:
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
 
-        return jsonify({
-            "error": str(e),
-            "used_hands_effectively": False,
-            "hands_detected": False,
-            "movement_detected": False,
-            "details": f"Error: {str(e)}"
-        }), 500
+        return jsonify(error_payload(str(e))), 500
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8081))  # Use port 8081 by default, or PORT env var
@@ -0,0 +1,193 @@
+"""
+Downloader Benchmark
+Serves a random payload from a local http.server stand-in with injected
+latency, per-connection bandwidth limits and dropped connections, then compares
+the original single-stream download loop with downloader.download_file.
+
+Usage: python benchmark_download.py [--size-mb 64] [--latency-ms 80]
+                                    [--conn-mbps 40] [--fail-rate 0.05]
+                                    [--no-ranges] [--weak-etag] [--runs 3]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from downloader import download_file, DownloadError
+
+LEGACY_CHUNK_SIZE = 8192
+LEGACY_MAX_ATTEMPTS = 5
+
+
+def make_handler(payload, latency, conn_bytes_per_sec, fail_rate, ranges_enabled, weak_etag=False):
+    """Build a request handler class bound to the benchmark settings."""
+    etag = f'"{hashlib.md5(payload).hexdigest()}"'  # As S3 reports single-part uploads
+    if weak_etag:
+        etag = 'W/' + etag
+    last_modified = 'Mon, 05 Jan 2026 10:00:00 GMT'
+    rng = random.Random(42)
+    rng_lock = threading.Lock()
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency)
+
+            start, end, status = 0, len(payload) - 1, 200
+            match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+            # If-Range only matches a strong ETag or the exact Last-Modified date
+            if_range = self.headers.get('If-Range')
+            if if_range is not None and (if_range.startswith('W/') or if_range not in (etag, last_modified)):
+                match = None
+            if ranges_enabled and match:
+                start = int(match.group(1))
+                end = min(int(match.group(2)), end) if match.group(2) else end
+                status = 206
+
+            body = memoryview(payload)[start:end + 1]
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Content-Type', 'video/webm')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            if ranges_enabled:
+                self.send_header('Accept-Ranges', 'bytes')
+            if status == 206:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{len(payload)}')
+            self.end_headers()
+
+            with rng_lock:
+                drop_at = int(len(body) * rng.random()) if rng.random() < fail_rate else None
+
+            # Throttle in 64 KB slices to emulate a per-connection bandwidth cap
+            sent = 0
+            slice_size = 64 * 1024
+            while sent < len(body):
+                if drop_at is not None and sent >= drop_at:
+                    self.close_connection = True
+                    return
+                chunk = body[sent:sent + slice_size]
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                if conn_bytes_per_sec:
+                    time.sleep(len(chunk) / conn_bytes_per_sec)
+
+    return StandInHandler
+
+
+def legacy_download(url, output_path):
+    """The original loop: one connection, 8 KB reads, start over on any failure."""
+    for attempt in range(1, LEGACY_MAX_ATTEMPTS + 1):
+        try:
+            request = urllib.request.Request(url)
+            with urllib.request.urlopen(request, timeout=30) as response:
+                with open(output_path, 'wb') as out_file:
+                    while True:
+                        chunk = response.read(LEGACY_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        out_file.write(chunk)
+                expected = response.getheader('Content-Length')
+            if expected and os.path.getsize(output_path) != int(expected):
+                raise IOError("short read")
+            return attempt - 1
+        except Exception:
+            if attempt == LEGACY_MAX_ATTEMPTS:
+                raise
+    return LEGACY_MAX_ATTEMPTS
+
+
+def sha256_file(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=float, default=64)
+    parser.add_argument('--latency-ms', type=float, default=80)
+    parser.add_argument('--conn-mbps', type=float, default=40, help='per-connection cap, megabits/s (0 = none)')
+    parser.add_argument('--fail-rate', type=float, default=0.05, help='probability a response is cut off')
+    parser.add_argument('--no-ranges', action='store_true', help='serve as a server without range support')
+    parser.add_argument('--weak-etag', action='store_true', help='send a weak ETag (W/"...")')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    payload = os.urandom(int(args.size_mb * 1024 * 1024))
+    expected_sha = hashlib.sha256(payload).hexdigest()
+
+    handler = make_handler(
+        payload,
+        args.latency_ms / 1000,
+        args.conn_mbps * 1_000_000 / 8,
+        args.fail_rate,
+        not args.no_ranges,
+        args.weak_etag
+    )
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/video.webm'
+
+    print(
+        f"Payload {args.size_mb:.0f} MB, latency {args.latency_ms:.0f} ms, "
+        f"{args.conn_mbps:.0f} Mbit/s per connection, fail rate {args.fail_rate:.0%}, "
+        f"ranges {'off' if args.no_ranges else 'on'}"
+    )
+    print(f"{'downloader':<10} {'run':>4} {'seconds':>8} {'MB/s':>7} {'retries':>8} {'mode':>9} {'ok':>4}")
+    print("-" * 56)
+
+    totals = {'legacy': [], 'parallel': []}
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, 'video.webm')
+
+        for run in range(1, args.runs + 1):
+            for name in ('legacy', 'parallel'):
+                start = time.perf_counter()
+                try:
+                    if name == 'legacy':
+                        retries, mode = legacy_download(url, output_path), 'stream'
+                    else:
+                        stats = download_file(url, output_path, expected_sha256=expected_sha)
+                        retries, mode = stats['retries'], stats['mode']
+                    ok = sha256_file(output_path) == expected_sha
+                except (DownloadError, Exception) as e:
+                    print(f"{name} run {run} failed: {e}", file=sys.stderr)
+                    retries, mode, ok = '-', '-', False
+                elapsed = time.perf_counter() - start
+
+                if ok:
+                    totals[name].append(elapsed)
+                print(
+                    f"{name:<10} {run:>4} {elapsed:>8.2f} {args.size_mb / elapsed:>7.1f} "
+                    f"{retries:>8} {mode:>9} {'yes' if ok else 'NO':>4}"
+                )
+
+    server.shutdown()
+
+    print("-" * 56)
+    for name, times in totals.items():
+        if times:
+            mean = sum(times) / len(times)
+            print(f"{name:<10} mean {mean:.2f}s ({args.size_mb / mean:.1f} MB/s), {len(times)}/{args.runs} verified")
+        else:
+            print(f"{name:<10} no successful runs")
+    if totals['legacy'] and totals['parallel']:
+        speedup = (sum(totals['legacy']) / len(totals['legacy'])) / (sum(totals['parallel']) / len(totals['parallel']))
+        print(f"speedup: {speedup:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
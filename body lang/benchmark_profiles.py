@@ -0,0 +1,187 @@
+"""
+Analysis Profile Benchmark
+Runs every analysis profile over a local corpus of videos and reports
+throughput plus how often each profile's verdict agrees with "accurate".
+Use it to pick the cheapest profile that still grades correctly.
+
+With --previews, the reference profile is also run with and without keyframe
+previews, alternating per video, to measure their overhead.
+
+Usage: python benchmark_profiles.py <video_dir_or_file> [...] [--json] [--previews]
+"""
+
+import json
+import os
+import sys
+import time
+
+from video_hand_analyzer import ANALYSIS_PROFILES, analyze_video_hands
+
+REFERENCE_PROFILE = 'accurate'
+VIDEO_EXTENSIONS = ('.webm', '.mp4', '.mov', '.avi', '.mkv')
+
+
+def collect_videos(paths):
+    """Expand directories into the video files they contain."""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    videos.append(os.path.join(path, name))
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            print(f"Skipping missing path: {path}", file=sys.stderr)
+    return videos
+
+
+def warm_up(videos):
+    """Untimed pass so page cache and model warm-up don't land on one profile."""
+    for video in videos:
+        analyze_video_hands(video, profile=REFERENCE_PROFILE)
+
+
+def run_profiles(profiles, videos):
+    """
+    Analyze every video with every profile, returning per-profile results and timing.
+
+    Profiles are interleaved per video, with the order rotated each time, so no
+    profile systematically runs first (cold) or last.
+    """
+    runs = {
+        profile: {"results": {}, "total_seconds": 0.0, "frames_processed": 0}
+        for profile in profiles
+    }
+
+    for index, video in enumerate(videos):
+        shift = index % len(profiles)
+        for profile in profiles[shift:] + profiles[:shift]:
+            start = time.perf_counter()
+            result = analyze_video_hands(video, profile=profile)
+            elapsed = time.perf_counter() - start
+
+            run = runs[profile]
+            run["total_seconds"] += elapsed
+            run["frames_processed"] += result.get("frames_processed", 0)
+            run["results"][video] = result
+
+    return runs
+
+
+def measure_preview_overhead(videos):
+    """
+    Time the reference profile with and without previews on each video.
+
+    The two runs alternate per video, swapping which goes first, so both see
+    the same warm cache and neither is compared against an earlier pass.
+    """
+    seconds = {False: 0.0, True: 0.0}
+    selector_ms = 0.0
+    for index, video in enumerate(videos):
+        for previews in ((False, True) if index % 2 == 0 else (True, False)):
+            start = time.perf_counter()
+            result = analyze_video_hands(video, profile=REFERENCE_PROFILE, previews=previews)
+            seconds[previews] += time.perf_counter() - start
+            if previews:
+                selector_ms += result.get("preview_overhead_ms", 0)
+
+    without, with_previews = seconds[False], seconds[True]
+    return {
+        "profile": REFERENCE_PROFILE,
+        "seconds_without": round(without, 3),
+        "seconds_with": round(with_previews, 3),
+        "overhead_pct": round((with_previews - without) / without * 100, 1) if without > 0 else 0,
+        "selector_ms_per_video": round(selector_ms / len(videos), 1)
+    }
+
+
+def summarize(runs, videos):
+    """Compare each profile's verdicts with the reference profile."""
+    reference = runs[REFERENCE_PROFILE]["results"]
+    reference_seconds = runs[REFERENCE_PROFILE]["total_seconds"]
+    summary = {}
+
+    for profile, run in runs.items():
+        agree = 0
+        disagreements = []
+        for video in videos:
+            verdict = run["results"][video]["used_hands_effectively"]
+            if verdict == reference[video]["used_hands_effectively"]:
+                agree += 1
+            else:
+                disagreements.append(os.path.basename(video))
+
+        seconds = run["total_seconds"]
+        summary[profile] = {
+            "videos": len(videos),
+            "total_seconds": round(seconds, 3),
+            "seconds_per_video": round(seconds / len(videos), 3),
+            "sampled_frames_per_second": round(run["frames_processed"] / seconds, 1) if seconds > 0 else 0,
+            "speedup_vs_reference": round(reference_seconds / seconds, 2) if seconds > 0 else 0,
+            "agreement": round(agree / len(videos), 3),
+            "disagreements": disagreements
+        }
+
+    return summary
+
+
+def print_table(summary):
+    print(f"{'profile':<10} {'s/video':>8} {'frames/s':>9} {'speedup':>8} {'agree':>7}")
+    print("-" * 46)
+    for profile, row in summary.items():
+        print(
+            f"{profile:<10} {row['seconds_per_video']:>8.2f} "
+            f"{row['sampled_frames_per_second']:>9.1f} "
+            f"{row['speedup_vs_reference']:>7.2f}x "
+            f"{row['agreement']:>7.1%}"
+        )
+        if row["disagreements"]:
+            print(f"           disagrees on: {', '.join(row['disagreements'])}")
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg not in ('--json', '--previews')]
+    as_json = '--json' in sys.argv[1:]
+    with_previews = '--previews' in sys.argv[1:]
+
+    if not args:
+        print("Usage: python benchmark_profiles.py <video_dir_or_file> [...] [--json] [--previews]")
+        sys.exit(1)
+
+    videos = collect_videos(args)
+    if not videos:
+        print("No videos found", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Benchmarking {len(ANALYSIS_PROFILES)} profiles on {len(videos)} videos", file=sys.stderr)
+
+    print("Warming up", file=sys.stderr)
+    warm_up(videos)
+
+    # Reference first in the list so a failure there aborts before the rest
+    order = [REFERENCE_PROFILE] + [p for p in ANALYSIS_PROFILES if p != REFERENCE_PROFILE]
+    runs = run_profiles(order, videos)
+
+    summary = summarize(runs, videos)
+    overhead = None
+    if with_previews:
+        print("Measuring preview overhead", file=sys.stderr)
+        overhead = measure_preview_overhead(videos)
+
+    if as_json:
+        if overhead:
+            summary = {"profiles": summary, "preview_overhead": overhead}
+        print(json.dumps(summary, indent=2))
+    else:
+        print_table(summary)
+        if overhead:
+            print(
+                f"\nPreviews ({REFERENCE_PROFILE}): {overhead['seconds_with']:.2f}s vs "
+                f"{overhead['seconds_without']:.2f}s ({overhead['overhead_pct']:+.1f}%), "
+                f"{overhead['selector_ms_per_video']:.1f} ms/video in selection and encoding"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,438 @@
+"""
+Parallel Range Downloader
+Fetches submission videos over keep-alive connections. Large objects are split
+into byte ranges downloaded in parallel; interrupted ranges resume from the last
+byte received. Servers without range support, or that answer a range with the full object
+(the object changed), fall back to a single stream.
+Every range response must cover exactly the bytes requested, the bytes received
+must add up to the object size, and the file is checked against the object's
+MD5 when the ETag is a plain (single-part) MD5, plus a caller-supplied SHA-256.
+"""
+
+import base64
+import hashlib
+import http.client
+import re
+import ssl
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# --- CONFIGURATION ---
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+PART_SIZE = 4 * 1024 * 1024          # Bytes per range request
+MIN_PARALLEL_SIZE = 8 * 1024 * 1024  # Smaller objects use one connection
+MAX_WORKERS = 4                      # Parallel range connections
+READ_SIZE = 1024 * 1024              # Bytes per socket read / file write
+MAX_RETRIES = 4                      # Consecutive failures tolerated per range
+RETRY_BACKOFF = 0.5                  # Seconds, doubled on each retry
+TIMEOUT = 30                         # Socket timeout in seconds
+MAX_REDIRECTS = 5
+
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+REDIRECT_STATUS = {301, 302, 303, 307, 308}
+
+
+class DownloadError(Exception):
+    """Raised when a download fails permanently or fails verification."""
+
+
+class _TransientError(Exception):
+    """A failure worth retrying (dropped connection, 5xx, timeout)."""
+
+
+class _RangeRejected(Exception):
+    """The server answered a range request with the full object (object changed, or If-Range didn't match)."""
+
+
+def _ssl_context():
+    # Create SSL context that doesn't verify certificates (for development)
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class _ConnectionPool:
+    """Keeps one keep-alive connection per thread and host."""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []
+        self._ssl_context = _ssl_context()
+
+    def get(self, parsed):
+        conns = getattr(self._local, 'conns', None)
+        if conns is None:
+            conns = self._local.conns = {}
+
+        key = (parsed.scheme, parsed.netloc)
+        conn = conns.get(key)
+        if conn is None:
+            if parsed.scheme == 'https':
+                conn = http.client.HTTPSConnection(
+                    parsed.hostname, parsed.port, timeout=self.timeout, context=self._ssl_context
+                )
+            else:
+                conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=self.timeout)
+            conns[key] = conn
+            with self._lock:
+                self._all.append(conn)
+        return conn
+
+    def reset(self, parsed):
+        """Drop this thread's connection so the next request reconnects."""
+        conns = getattr(self._local, 'conns', {})
+        conn = conns.pop((parsed.scheme, parsed.netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all = []
+
+
+def _request(pool, url, headers=None):
+    """Send a GET over the pooled connection, returning the open response."""
+    parsed = urllib.parse.urlsplit(url)
+    path = parsed.path or '/'
+    if parsed.query:
+        path += '?' + parsed.query
+
+    conn = pool.get(parsed)
+    try:
+        conn.request('GET', path, headers={'User-Agent': USER_AGENT, **(headers or {})})
+        response = conn.getresponse()
+    except (OSError, http.client.HTTPException) as e:
+        pool.reset(parsed)
+        raise _TransientError(f"{type(e).__name__}: {e}") from e
+
+    if response.status in TRANSIENT_STATUS:
+        response.read()
+        raise _TransientError(f"HTTP {response.status}")
+    return response
+
+
+def _backoff(attempt):
+    time.sleep(RETRY_BACKOFF * (2 ** (attempt - 1)))
+
+
+def _probe(pool, url):
+    """
+    Ask for the first byte to learn the size and whether ranges are supported.
+
+    Returns (final_url, response). A 206 response has already been read; a 200
+    response is left unread so a server that ignores Range can be streamed
+    without a second request.
+    """
+    attempts = 0
+    redirects = 0
+    while True:
+        try:
+            response = _request(pool, url, {'Range': 'bytes=0-0'})
+
+            if response.status in REDIRECT_STATUS:
+                response.read()
+                redirects += 1
+                if redirects > MAX_REDIRECTS:
+                    raise DownloadError("Too many redirects")
+                url = urllib.parse.urljoin(url, response.getheader('Location'))
+                continue
+
+            if response.status not in (200, 206):
+                response.read()
+                raise DownloadError(f"HTTP Error {response.status}: {response.reason}")
+
+            if response.status == 206:
+                response.read()
+            return url, response
+
+        except (_TransientError, OSError, http.client.HTTPException) as e:
+            pool.reset(urllib.parse.urlsplit(url))
+            attempts += 1
+            if attempts > MAX_RETRIES:
+                raise DownloadError(f"Probe failed after {attempts} attempts: {e}")
+            print(f"Probe retry {attempts}: {e}", file=sys.stderr)
+            _backoff(attempts)
+
+
+def _parse_content_range(content_range):
+    """(first, last, total) from 'bytes 0-0/12345'; total is None for '*'."""
+    match = re.match(r'\s*bytes\s+(\d+)-(\d+)/(\d+|\*)\s*$', content_range or '')
+    if not match:
+        return None
+    first, last, total = match.groups()
+    return int(first), int(last), (int(total) if total != '*' else None)
+
+
+def _parse_total(content_range):
+    """Total size from 'bytes 0-0/12345', or None if the server doesn't say."""
+    parsed = _parse_content_range(content_range)
+    return parsed[2] if parsed else None
+
+
+def _expected_md5(response):
+    """
+    Hex MD5 of the whole object if the server states it, else None.
+
+    Uses x-goog-hash when present; otherwise a strong ETag of 32 hex digits,
+    which S3-compatible stores set to the MD5 of single-part uploads
+    (multipart ETags carry a '-N' suffix and are skipped).
+    """
+    for part in (response.getheader('x-goog-hash') or '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name == 'md5' and value:
+            try:
+                return base64.b64decode(value).hex()
+            except ValueError:
+                return None
+
+    etag = (response.getheader('ETag') or '').strip()
+    if etag.startswith('W/'):
+        return None
+    etag = etag.strip('"').lower()
+    if re.fullmatch(r'[0-9a-f]{32}', etag):
+        return etag
+    return None
+
+
+def _range_validator(response):
+    """
+    If-Range value for later range requests, or None.
+
+    A weak ETag (W/"...") must never match If-Range, so a compliant server
+    would answer every range with the full object; Last-Modified is used
+    instead in that case.
+    """
+    etag = (response.getheader('ETag') or '').strip()
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.getheader('Last-Modified')
+
+
+def _fetch_range(pool, url, output_path, start, end, total, validator, stats, stop):
+    """
+    Download bytes start..end (inclusive) into place, resuming after failures.
+
+    Returns the number of bytes received. Gives up early once stop is set
+    (another range failed permanently).
+    """
+    parsed = urllib.parse.urlsplit(url)
+    offset = start
+    attempts = 0
+    received = 0
+
+    with open(output_path, 'r+b') as out_file:
+        while offset <= end:
+            if stop.is_set():
+                raise DownloadError("Cancelled after another range failed")
+            attempt_start = offset
+            headers = {'Range': f'bytes={offset}-{end}'}
+            if validator:
+                # Any change to the object turns this into a full 200 response
+                headers['If-Range'] = validator
+
+            try:
+                response = _request(pool, url, headers)
+                if response.status == 200:
+                    # Don't drain what may be the whole object; drop the connection
+                    pool.reset(parsed)
+                    raise _RangeRejected(f"Range {offset}-{end} answered with the full object")
+                if response.status != 206:
+                    response.read()
+                    raise DownloadError(f"Expected 206 for range, got {response.status}")
+                content_range = response.getheader('Content-Range')
+                if _parse_content_range(content_range) != (offset, end, total):
+                    response.read()
+                    raise DownloadError(
+                        f"Asked for bytes {offset}-{end}/{total}, server sent {content_range!r}"
+                    )
+
+                out_file.seek(offset)
+                while offset <= end:
+                    if stop.is_set():
+                        raise DownloadError("Cancelled after another range failed")
+                    block = response.read(min(READ_SIZE, end - offset + 1))
+                    if not block:
+                        raise _TransientError("Connection closed mid-range")
+                    out_file.write(block)
+                    offset += len(block)
+                    received += len(block)
+
+            except (_TransientError, OSError, http.client.HTTPException) as e:
+                pool.reset(parsed)
+                # Only consecutive failures without progress count against the limit
+                attempts = 1 if offset > attempt_start else attempts + 1
+                if attempts > MAX_RETRIES:
+                    raise DownloadError(f"Range {start}-{end} failed at byte {offset}: {e}")
+                with stats['lock']:
+                    stats['retries'] += 1
+                print(f"Resuming range {start}-{end} at byte {offset}: {e}", file=sys.stderr)
+                _backoff(attempts)
+
+    return received
+
+
+def _fetch_stream(pool, url, output_path, response, stats):
+    """
+    Single-stream download for servers without range support.
+
+    Nothing can be resumed, so any failure restarts from the first byte.
+    Returns (bytes_received, content_length, md5), where content_length is
+    what the server announced (or None) and md5 comes from _expected_md5.
+    """
+    parsed = urllib.parse.urlsplit(url)
+    attempts = 0
+
+    while True:
+        try:
+            if response is None:
+                response = _request(pool, url)
+                if response.status != 200:
+                    response.read()
+                    raise DownloadError(f"HTTP Error {response.status}: {response.reason}")
+
+            length = response.getheader('Content-Length')
+            expected = int(length) if length and length.isdigit() else None
+
+            written = 0
+            with open(output_path, 'wb') as out_file:
+                while True:
+                    block = response.read(READ_SIZE)
+                    if not block:
+                        break
+                    out_file.write(block)
+                    written += len(block)
+
+            if expected is not None and written != expected:
+                raise _TransientError(f"Stream ended after {written} of {expected} bytes")
+            return written, expected, _expected_md5(response)
+
+        except (_TransientError, OSError, http.client.HTTPException) as e:
+            pool.reset(parsed)
+            response = None
+            attempts += 1
+            if attempts > MAX_RETRIES:
+                raise DownloadError(f"Stream failed after {attempts} attempts: {e}")
+            stats['retries'] += 1
+            print(f"Restarting stream (no range support): {e}", file=sys.stderr)
+            _backoff(attempts)
+
+
+def _file_digest(path, algorithm):
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def download_file(url, output_path, expected_sha256=None, max_workers=MAX_WORKERS,
+                  part_size=PART_SIZE, min_parallel_size=MIN_PARALLEL_SIZE, timeout=TIMEOUT):
+    """
+    Download url to output_path.
+
+    Returns:
+        dict: {"bytes": int, "mode": "parallel" | "range" | "stream",
+               "parts": int, "retries": int, "seconds": float,
+               "verified": list of checks passed, e.g. ["length", "md5"]}
+
+    Raises:
+        DownloadError: on permanent failure, retries exhausted, a range
+            response that doesn't match the request, or a length/checksum
+            mismatch.
+    """
+    started = time.monotonic()
+    pool = _ConnectionPool(timeout)
+    stats = {'retries': 0, 'lock': threading.Lock()}
+    verified = []
+
+    try:
+        url, response = _probe(pool, url)
+
+        total = None
+        if response.status == 206:
+            total = _parse_total(response.getheader('Content-Range'))
+            validator = _range_validator(response)
+            expected_md5 = _expected_md5(response)
+
+        if total is None:
+            # No usable range support: stream whatever the probe returned
+            if response.status == 206:
+                response = None
+            received, total, expected_md5 = _fetch_stream(pool, url, output_path, response, stats)
+            mode, parts = 'stream', 1
+
+        else:
+            if total == 0:
+                raise DownloadError("Server reported an empty object")
+
+            # Preallocate so every range writes into its own slice of the file
+            with open(output_path, 'wb') as out_file:
+                out_file.truncate(total)
+
+            if total >= min_parallel_size and max_workers > 1:
+                ranges = [(s, min(s + part_size, total) - 1) for s in range(0, total, part_size)]
+                mode = 'parallel'
+            else:
+                ranges = [(0, total - 1)]
+                mode = 'range'
+            parts = len(ranges)
+
+            # The first permanent failure stops the other ranges instead of
+            # letting them download a file that will be discarded anyway
+            stop = threading.Event()
+            received = 0
+            try:
+                with ThreadPoolExecutor(max_workers=min(max_workers, parts)) as executor:
+                    futures = [
+                        executor.submit(_fetch_range, pool, url, output_path, s, e, total, validator, stats, stop)
+                        for s, e in ranges
+                    ]
+                    try:
+                        for future in as_completed(futures):
+                            received += future.result()
+                    except BaseException:
+                        stop.set()
+                        for future in futures:
+                            future.cancel()
+                        raise
+
+            except _RangeRejected as e:
+                # The parts may now come from different versions of the
+                # object, so start over with one stream of the current one
+                print(f"{e}; restarting as a single stream", file=sys.stderr)
+                received, total, expected_md5 = _fetch_stream(pool, url, output_path, None, stats)
+                mode, parts = 'stream', 1
+
+        # --- VERIFY ---
+        if total is not None:
+            if received != total:
+                raise DownloadError(f"Length mismatch: expected {total} bytes, received {received}")
+            verified.append("length")
+        if expected_md5:
+            if _file_digest(output_path, 'md5') != expected_md5:
+                raise DownloadError("MD5 mismatch against the server's ETag/hash")
+            verified.append("md5")
+        if expected_sha256:
+            if _file_digest(output_path, 'sha256') != expected_sha256.lower():
+                raise DownloadError("SHA-256 checksum mismatch")
+            verified.append("sha256")
+
+        return {
+            "bytes": received,
+            "mode": mode,
+            "parts": parts,
+            "retries": stats['retries'],
+            "seconds": time.monotonic() - started,
+            "verified": verified
+        }
+
+    finally:
+        pool.close()
@@ -0,0 +1,127 @@
+"""
+Hand Skeleton Drawing and Keyframe Previews
+Shared skeleton overlay used by tracker.py (live webcam) and by
+video_hand_analyzer.py, which picks a few representative sampled frames during
+its analysis pass and returns them as small annotated JPEG thumbnails.
+"""
+
+import base64
+import time
+
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+PREVIEW_MAX_WIDTH = 320   # Thumbnail width in pixels
+PREVIEW_JPEG_QUALITY = 70
+
+# Skeleton connections
+HAND_CONNECTIONS = [
+    (0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12), (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20)
+]
+
+
+def draw_landmarks_on_image(rgb_image, detection_result):
+    hand_landmarks_list = detection_result.hand_landmarks
+    annotated_image = np.copy(rgb_image)
+    height, width, _ = annotated_image.shape
+
+    for hand_landmarks in hand_landmarks_list:
+        points = {}
+        for idx, landmark in enumerate(hand_landmarks):
+            x = int(landmark.x * width)
+            y = int(landmark.y * height)
+            points[idx] = (x, y)
+
+        for connection in HAND_CONNECTIONS:
+            start_idx = connection[0]
+            end_idx = connection[1]
+            if start_idx in points and end_idx in points:
+                cv2.line(annotated_image, points[start_idx], points[end_idx], (0, 255, 0), 2)
+
+        for idx, point in points.items():
+            cv2.circle(annotated_image, point, 4, (255, 0, 0), -1)
+
+    return annotated_image
+
+
+def _thumbnail(frame):
+    height, width = frame.shape[:2]
+    if width <= PREVIEW_MAX_WIDTH:
+        return frame.copy()
+    scale = PREVIEW_MAX_WIDTH / width
+    return cv2.resize(frame, (PREVIEW_MAX_WIDTH, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+
+class KeyframeSelector:
+    """
+    Keeps the best candidate frame for each preview label during one pass.
+
+    Only a thumbnail-sized copy is kept when a candidate improves, and drawing
+    and JPEG encoding happen once per label in build(), so the extra cost is
+    bounded by the number of labels rather than the number of sampled frames.
+    """
+
+    def __init__(self):
+        self._candidates = {}
+        self.seconds = 0.0
+
+    def _offer(self, label, score, frame, detection_result, timestamp):
+        current = self._candidates.get(label)
+        if current is not None and score <= current["score"]:
+            return
+        self._candidates[label] = {
+            "score": score,
+            "thumbnail": _thumbnail(frame),
+            "detection_result": detection_result,
+            "timestamp": timestamp
+        }
+
+    def observe(self, frame, detection_result, movement, timestamp):
+        """
+        Consider one sampled BGR frame.
+
+        movement is the largest wrist displacement in this frame (normalized
+        coordinates), or 0 when nothing could be compared.
+        """
+        start = time.perf_counter()
+        hands = len(detection_result.hand_landmarks)
+
+        if hands == 0:
+            # First frame where the speaker's hands are out of view
+            self._offer("hands_absent", 0, frame, detection_result, timestamp)
+        else:
+            self._offer("hands_visible", hands, frame, detection_result, timestamp)
+            if movement > 0:
+                self._offer("peak_movement", movement, frame, detection_result, timestamp)
+
+        self.seconds += time.perf_counter() - start
+
+    def build(self):
+        """Draw the skeleton on each kept frame and encode it as a base64 JPEG."""
+        start = time.perf_counter()
+        previews = []
+
+        for label in ("peak_movement", "hands_visible", "hands_absent"):
+            candidate = self._candidates.get(label)
+            if candidate is None:
+                continue
+
+            annotated = draw_landmarks_on_image(candidate["thumbnail"], candidate["detection_result"])
+            ok, encoded = cv2.imencode('.jpg', annotated, [cv2.IMWRITE_JPEG_QUALITY, PREVIEW_JPEG_QUALITY])
+            if not ok:
+                continue
+
+            height, width = annotated.shape[:2]
+            previews.append({
+                "label": label,
+                "timestamp": round(candidate["timestamp"], 2),
+                "width": width,
+                "height": height,
+                "image": "data:image/jpeg;base64," + base64.b64encode(encoded.tobytes()).decode('ascii')
+            })
+
+        self.seconds += time.perf_counter() - start
+        return previews
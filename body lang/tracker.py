@@ -1,20 +1,13 @@
 import cv2
 import mediapipe as mp
 import time
-import numpy as np
+from hand_previews import draw_landmarks_on_image
 
 # --- CONFIGURATION ---
 MODEL_PATH = 'hand_landmarker.task' 
 MOVEMENT_THRESHOLD = 0.05  # 10% of screen movement
 CHECK_INTERVAL = 0.5       # Check every 1 second
 
-# Skeleton connections
-HAND_CONNECTIONS = [
-    (0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8),
-    (5, 9), (9, 10), (10, 11), (11, 12), (9, 13), (13, 14), (14, 15), (15, 16),
-    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20)
-]
-
 # --- SETUP MEDIAPIPE ---
 BaseOptions = mp.tasks.BaseOptions
 HandLandmarker = mp.tasks.vision.HandLandmarker
@@ -29,29 +22,6 @@ def result_callback(result: HandLandmarkerResult, output_image: mp.Image, timest
     global latest_result
     latest_result = result
 
-def draw_landmarks_on_image(rgb_image, detection_result):
-    hand_landmarks_list = detection_result.hand_landmarks
-    annotated_image = np.copy(rgb_image)
-    height, width, _ = annotated_image.shape
-
-    for hand_landmarks in hand_landmarks_list:
-        points = {} 
-        for idx, landmark in enumerate(hand_landmarks):
-            x = int(landmark.x * width)
-            y = int(landmark.y * height)
-            points[idx] = (x, y)
-
-        for connection in HAND_CONNECTIONS:
-            start_idx = connection[0]
-            end_idx = connection[1]
-            if start_idx in points and end_idx in points:
-                cv2.line(annotated_image, points[start_idx], points[end_idx], (0, 255, 0), 2)
-
-        for idx, point in points.items():
-            cv2.circle(annotated_image, point, 4, (255, 0, 0), -1)
-            
-    return annotated_image
-
 # --- MAIN EXECUTION ---
 def main():
     options = HandLandmarkerOptions(
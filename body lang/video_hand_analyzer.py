@@ -8,17 +8,64 @@ import cv2
 import mediapipe as mp
 import sys
 import json
-import urllib.request
-import urllib.error
-import ssl
 import tempfile
 import os
+from downloader import download_file, DownloadError
+from hand_previews import KeyframeSelector
 
 # --- CONFIGURATION ---
 MODEL_PATH = 'hand_landmarker.task'
 MOVEMENT_THRESHOLD = 0.05  # 5% of screen movement
 CHECK_INTERVAL = 0.5       # Check every 0.5 seconds
 
+# --- ANALYSIS PROFILES ---
+# Each profile bundles the knobs that trade speed for accuracy:
+#   check_interval      - seconds between sampled frames
+#   max_dimension       - longest side (px) a frame is downscaled to before
+#                         detection, None = full capture resolution
+#   num_hands           - max hands the landmarker looks for
+#   min_*_confidence    - MediaPipe detection/presence/tracking thresholds
+#                         (tracking only matters outside IMAGE mode)
+# "accurate" matches the original fixed settings and is the reference the
+# benchmark harness (benchmark_profiles.py) compares the others against.
+ANALYSIS_PROFILES = {
+    "fast": {
+        # Speed comes from sparser sampling, smaller frames and looking for
+        # one hand (enough to show gesturing). The confidences only filter
+        # detections after they run; 0.6 trades recall for fewer false hands
+        "check_interval": 1.0,
+        "max_dimension": 480,
+        "num_hands": 1,
+        "min_hand_detection_confidence": 0.6,
+        "min_hand_presence_confidence": 0.6,
+        "min_tracking_confidence": 0.5
+    },
+    "balanced": {
+        "check_interval": CHECK_INTERVAL,
+        "max_dimension": 720,
+        "num_hands": 2,
+        "min_hand_detection_confidence": 0.5,
+        "min_hand_presence_confidence": 0.5,
+        "min_tracking_confidence": 0.5
+    },
+    "accurate": {
+        "check_interval": CHECK_INTERVAL,
+        "max_dimension": None,
+        "num_hands": 2,
+        "min_hand_detection_confidence": 0.5,
+        "min_hand_presence_confidence": 0.5,
+        "min_tracking_confidence": 0.5
+    }
+}
+DEFAULT_PROFILE = os.environ.get('ANALYSIS_PROFILE', 'accurate')
+
+# Fail at startup rather than blaming every request for a bad server setting
+if DEFAULT_PROFILE not in ANALYSIS_PROFILES:
+    raise ValueError(
+        f"ANALYSIS_PROFILE='{DEFAULT_PROFILE}' is not a known profile. "
+        f"Expected one of: {', '.join(ANALYSIS_PROFILES)}"
+    )
+
 # --- SETUP MEDIAPIPE ---
 BaseOptions = mp.tasks.BaseOptions
 HandLandmarker = mp.tasks.vision.HandLandmarker
@@ -27,50 +74,84 @@ VisionRunningMode = mp.tasks.vision.RunningMode
 
 
 def download_video(url, output_path):
-    """Download video from URL to local file with proper SSL and headers."""
-    try:
-        # Create SSL context that doesn't verify certificates (for development)
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-
-        # Create request with user-agent header
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-        request = urllib.request.Request(url, headers=headers)
+    """
+    Download video from URL to local file.
 
-        # Download video
+    Large objects are fetched as parallel byte ranges with resume on transient
+    errors (see downloader.py); returns True on a verified, complete download.
+    """
+    try:
         print(f"Downloading from: {url}", file=sys.stderr)
-        with urllib.request.urlopen(request, context=ssl_context, timeout=30) as response:
-            with open(output_path, 'wb') as out_file:
-                # Download in chunks
-                chunk_size = 8192
-                while True:
-                    chunk = response.read(chunk_size)
-                    if not chunk:
-                        break
-                    out_file.write(chunk)
-
-        print(f"Download complete: {os.path.getsize(output_path)} bytes", file=sys.stderr)
+        stats = download_file(url, output_path)
+
+        print(
+            f"Download complete: {stats['bytes']} bytes in {stats['seconds']:.2f}s "
+            f"({stats['mode']}, {stats['parts']} parts, {stats['retries']} retries, "
+            f"verified: {', '.join(stats['verified']) or 'none'})",
+            file=sys.stderr
+        )
         return True
 
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error {e.code}: {e.reason}", file=sys.stderr)
+    except DownloadError as e:
+        print(f"Download failed: {e}", file=sys.stderr)
         print(f"URL: {url}", file=sys.stderr)
         return False
-    except urllib.error.URLError as e:
-        print(f"URL Error: {e.reason}", file=sys.stderr)
-        return False
     except Exception as e:
         print(f"Error downloading video: {type(e).__name__}: {e}", file=sys.stderr)
         return False
 
 
-def analyze_video_hands(video_path):
+class AnalysisAborted(Exception):
+    """Raised when should_abort() asks a running analysis to stop early."""
+
+
+def get_profile(name=None):
+    """
+    Look up an analysis profile by name.
+
+    Falls back to DEFAULT_PROFILE when name is None.
+    Raises ValueError for unknown or non-string profile names.
+    """
+    if name is None:
+        name = DEFAULT_PROFILE
+    if not isinstance(name, str):
+        raise ValueError(f"Analysis profile must be a string, got {type(name).__name__}")
+    if name not in ANALYSIS_PROFILES:
+        raise ValueError(
+            f"Unknown analysis profile '{name}'. "
+            f"Expected one of: {', '.join(ANALYSIS_PROFILES)}"
+        )
+    return ANALYSIS_PROFILES[name]
+
+
+def downscale_frame(frame, max_dimension):
+    """Shrink frame so its longest side is at most max_dimension pixels."""
+    if not max_dimension:
+        return frame
+
+    height, width = frame.shape[:2]
+    longest = max(height, width)
+    if longest <= max_dimension:
+        return frame
+
+    scale = max_dimension / longest
+    new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    return cv2.resize(frame, new_size, interpolation=cv2.INTER_AREA)
+
+
+def analyze_video_hands(video_path, profile=None, should_abort=None, previews=False):
     """
     Analyze video for hand presence and movement.
 
+    Args:
+        video_path: Local path to the video file
+        profile: Name of an entry in ANALYSIS_PROFILES (defaults to DEFAULT_PROFILE)
+        should_abort: Optional callable checked on every sampled frame; when it
+            returns True the analysis stops and AnalysisAborted is raised
+        previews: When True, also return annotated JPEG thumbnails of a few
+            representative sampled frames (peak movement, hands visible,
+            hands absent) picked during the same pass
+
     Returns:
         dict: {
             "used_hands_effectively": bool,
@@ -79,14 +160,19 @@ def analyze_video_hands(video_path):
             "details": str
         }
     """
+    profile_name = profile or DEFAULT_PROFILE
+    settings = get_profile(profile_name)
+    check_interval = settings["check_interval"]
+    max_dimension = settings["max_dimension"]
+
     # Initialize MediaPipe HandLandmarker in IMAGE mode
     options = HandLandmarkerOptions(
         base_options=BaseOptions(model_asset_path=MODEL_PATH),
         running_mode=VisionRunningMode.IMAGE,
-        num_hands=2,
-        min_hand_detection_confidence=0.5,
-        min_hand_presence_confidence=0.5,
-        min_tracking_confidence=0.5
+        num_hands=settings["num_hands"],
+        min_hand_detection_confidence=settings["min_hand_detection_confidence"],
+        min_hand_presence_confidence=settings["min_hand_presence_confidence"],
+        min_tracking_confidence=settings["min_tracking_confidence"]
     )
 
     # Open video file
@@ -104,8 +190,8 @@ def analyze_video_hands(video_path):
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     duration = total_frames / fps if fps > 0 else 0
 
-    # Calculate frame interval (sample every CHECK_INTERVAL seconds)
-    frame_interval = int(fps * CHECK_INTERVAL) if fps > 0 else 1
+    # Calculate frame interval (sample every check_interval seconds)
+    frame_interval = max(1, int(fps * check_interval)) if fps > 0 else 1
 
     # Tracking variables
     hand_states = {
@@ -116,9 +202,11 @@ def analyze_video_hands(video_path):
     hands_detected_any_frame = False
     movement_detected_any_frame = False
     frames_processed = 0
+    aborted = False
+    selector = KeyframeSelector() if previews else None
 
     print(f"Processing video: {duration:.1f}s, {total_frames} frames, {fps:.1f} fps", file=sys.stderr)
-    print(f"Sampling every {frame_interval} frames ({CHECK_INTERVAL}s intervals)", file=sys.stderr)
+    print(f"Sampling every {frame_interval} frames ({check_interval}s intervals, profile: {profile_name})", file=sys.stderr)
 
     with HandLandmarker.create_from_options(options) as landmarker:
         frame_count = 0
@@ -130,15 +218,25 @@ def analyze_video_hands(video_path):
 
             # Only process frames at specified intervals
             if frame_count % frame_interval == 0:
+                if should_abort and should_abort():
+                    aborted = True
+                    break
+
                 frames_processed += 1
 
+                # Downscale before detection; landmarks are normalized so
+                # MOVEMENT_THRESHOLD is unaffected by the inference size
+                small_frame = downscale_frame(frame, max_dimension)
+
                 # Convert frame to MediaPipe Image format
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
                 mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
 
                 # Detect hands
                 detection_result = landmarker.detect(mp_image)
 
+                frame_movement = 0
+
                 if detection_result.hand_landmarks:
                     hands_detected_any_frame = True
 
@@ -156,6 +254,7 @@ def analyze_video_hands(video_path):
                             if last_pos:
                                 delta_x = abs(current_x - last_pos[0])
                                 delta_y = abs(current_y - last_pos[1])
+                                frame_movement = max(frame_movement, delta_x, delta_y)
 
                                 if delta_x > MOVEMENT_THRESHOLD or delta_y > MOVEMENT_THRESHOLD:
                                     hand_states[label]["moved"] = True
@@ -164,10 +263,18 @@ def analyze_video_hands(video_path):
                             # Update position for next check
                             hand_states[label]["last_pos"] = (current_x, current_y)
 
+                if selector:
+                    timestamp = frame_count / fps if fps > 0 else 0
+                    selector.observe(small_frame, detection_result, frame_movement, timestamp)
+
             frame_count += 1
 
     cap.release()
 
+    if aborted:
+        print(f"Analysis aborted after {frames_processed} frames", file=sys.stderr)
+        raise AnalysisAborted(f"Analysis aborted after {frames_processed} sampled frames")
+
     # Determine result
     used_effectively = hands_detected_any_frame and movement_detected_any_frame
 
@@ -182,27 +289,42 @@ def analyze_video_hands(video_path):
     print(f"Analysis complete: {frames_processed} frames processed", file=sys.stderr)
     print(f"Hands detected: {hands_detected_any_frame}, Movement: {movement_detected_any_frame}", file=sys.stderr)
 
-    return {
+    result = {
         "used_hands_effectively": used_effectively,
         "hands_detected": hands_detected_any_frame,
         "movement_detected": movement_detected_any_frame,
         "details": details,
-        "frames_processed": frames_processed
+        "frames_processed": frames_processed,
+        "profile": profile_name
     }
 
+    if selector:
+        result["previews"] = selector.build()
+        result["preview_overhead_ms"] = round(selector.seconds * 1000, 1)
+        print(f"Built {len(result['previews'])} previews in {result['preview_overhead_ms']} ms", file=sys.stderr)
+
+    return result
+
 
 def main():
     """
     Main entry point for CLI usage.
-    Usage: python video_hand_analyzer.py <video_url_or_path>
+    Usage: python video_hand_analyzer.py <video_url_or_path> [profile]
     """
     if len(sys.argv) < 2:
         print(json.dumps({
-            "error": "Usage: python video_hand_analyzer.py <video_url_or_path>"
+            "error": "Usage: python video_hand_analyzer.py <video_url_or_path> [fast|balanced|accurate]"
         }))
         sys.exit(1)
 
     input_path = sys.argv[1]
+    profile = sys.argv[2] if len(sys.argv) > 2 else None
+
+    try:
+        get_profile(profile)
+    except ValueError as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
 
     # Check if input is a URL or local file
     is_url = input_path.startswith(('http://', 'https://'))
@@ -223,7 +345,7 @@ def main():
 
     try:
         # Analyze video
-        result = analyze_video_hands(video_path)
+        result = analyze_video_hands(video_path, profile=profile)
 
         # Output JSON result
         print(json.dumps(result))
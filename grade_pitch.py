@@ -1,7 +1,7 @@
 import boto3
 import json
-
-bedrock = boto3.client("bedrock-runtime", region_name="us-east-1")
+from pregrade import pregrade
+from bedrock_metrics import instrument, prompt_version, mark_parse_failure, record_for
 
 SYSTEM_PROMPT = """
 <system>
@@ -35,7 +35,19 @@ Output ONLY a JSON object with this shape:
 </system>
 """
 
-def grade_pitch(transcript: str):
+bedrock = instrument(
+    boto3.client("bedrock-runtime", region_name="us-east-1"),
+    rubric="three_sentence_pitch",
+    prompt_version=prompt_version(SYSTEM_PROMPT),
+)
+
+def invoke_nova(prompt_text: str, model_id: str = "amazon.nova-lite-v1:0", max_tokens: int = 512):
+    """
+    Send one user message to Nova via invoke_model.
+
+    Returns (raw_text, usage, record); record is the metrics record for this
+    call, for mark_parse_failure().
+    """
 
     body = {
         "messages": [
@@ -43,26 +55,19 @@ def grade_pitch(transcript: str):
                 "role": "user",
                 "content": [
                     {
-                        "text": f"""
-{SYSTEM_PROMPT}
-
-<user>
-Here is the transcript to grade:
-{transcript}
-</user>
-"""
+                        "text": prompt_text
                     }
                 ]
             }
         ],
         "inferenceConfig": {
-            "maxTokens": 512,
+            "maxTokens": max_tokens,
             "temperature": 0
         }
     }
 
     response = bedrock.invoke_model(
-        modelId="amazon.nova-lite-v1:0",
+        modelId=model_id,
         contentType="application/json",
         accept="application/json",
         body=json.dumps(body),
@@ -73,11 +78,37 @@ Here is the transcript to grade:
     # Nova returns in outputText or messages depending on SDK
     if "outputText" in response_body:
         raw_text = response_body["outputText"]
+    elif "output" in response_body:
+        raw_text = response_body["output"]["message"]["content"][0]["text"]
     else:
         raw_text = response_body["messages"][-1]["content"][0]["text"]
 
-    return json.loads(raw_text)
+    return raw_text, response_body.get("usage", {}), record_for(response)
+
+def grade_pitch(transcript: str, model_id: str = "amazon.nova-lite-v1:0"):
+
+    raw_text, _, record = invoke_nova(f"""
+{SYSTEM_PROMPT}
+
+<user>
+Here is the transcript to grade:
+{transcript}
+</user>
+""", model_id=model_id)
+
+    try:
+        return json.loads(raw_text)
+    except json.JSONDecodeError:
+        mark_parse_failure(record)
+        raise
+
+def grade_pitch_routed(transcript: str):
+    """Pre-grade locally, then call the model tier the pre-grader picked (if any)."""
+    decision = pregrade(transcript)
+    if decision["action"] == "local":
+        return decision["result"]
+    return grade_pitch(transcript, model_id=decision["model_id"])
 
 if __name__ == "__main__":
     transcript = "College students struggle with time management. I built an app that organizes all assignments. It helps students stay on track and reduce stress."
-    print(json.dumps(grade_pitch(transcript), indent=2))
+    print(json.dumps(grade_pitch_routed(transcript), indent=2))
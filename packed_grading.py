@@ -0,0 +1,343 @@
+"""
+Packed multi-transcript grading.
+
+Sends the rubric/system prompt once with N transcripts (each tagged with a
+stable id) and asks for a JSON array of per-id results. Items that come back
+missing or malformed are re-graded one at a time. N is chosen from the
+output-token budget, shrinks after a bad packed response and grows back after
+clean packed responses or successful single calls. Throttling and timeouts
+are retried with backoff and don't change N; a ValidationException (e.g. input
+too long) on a packed call halves N like a bad response.
+"""
+
+import json
+import re
+import time
+
+from bedrock_metrics import mark_parse_failure, prompt_version, tags
+from pregrade import pregrade
+
+try:
+    from botocore.exceptions import ConnectionError as BotoConnectionError, HTTPClientError
+    TRANSIENT_EXCEPTIONS = (TimeoutError, ConnectionError, BotoConnectionError, HTTPClientError)
+except ImportError:
+    TRANSIENT_EXCEPTIONS = (TimeoutError, ConnectionError)
+
+MAX_PACK_SIZE = 20
+MAX_OUTPUT_TOKENS = 5000         # Nova Lite output limit per call
+MAX_PACK_INPUT_TOKENS = 12000    # Keep packed prompts well inside the context window
+OUTPUT_TOKENS_PER_ITEM = 300     # Starting estimate, refined from observed usage
+SINGLE_MAX_TOKENS = 512          # Same budget grade_pitch uses
+CHARS_PER_TOKEN = 4
+CALL_RETRIES = 2                 # Extra attempts for a packed call that raises
+RETRY_BACKOFF = 0.5              # Seconds, doubled on each retry
+TRANSIENT_ERROR_CODES = {
+    "ThrottlingException",
+    "ServiceUnavailableException",
+    "ModelTimeoutException",
+    "ModelNotReadyException",
+    "InternalServerException",
+}
+SINGLES_PER_REGROW = 3           # Successful single calls before N grows by one,
+MAX_SINGLES_PER_REGROW = 48      # doubled each time packing collapses to one again
+
+RESULT_KEYS = (
+    "problem_clarity_score",
+    "solution_clarity_score",
+    "benefit_score",
+    "structure_score",
+    "tone_score",
+    "total_score",
+)
+
+PACKED_INSTRUCTIONS = """
+<batch>
+Grade EACH transcript below independently using the rubric above.
+Output ONLY a JSON array with one object per transcript. Each object must
+contain "id" (copied exactly from the transcript tag) and every field of the
+JSON shape described above. Do not add any text outside the array.
+</batch>
+"""
+
+
+def error_code(error):
+    """AWS error code of a botocore ClientError, or None."""
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        return response.get("Error", {}).get("Code")
+    return None
+
+
+def is_transient(error):
+    """True for throttling, timeouts and dropped connections, which are worth retrying."""
+    return error_code(error) in TRANSIENT_ERROR_CODES or isinstance(error, TRANSIENT_EXCEPTIONS)
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token)."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def build_single_prompt(system_prompt, transcript):
+    # Same layout grade_pitch sends
+    return f"""
+{system_prompt}
+
+<user>
+Here is the transcript to grade:
+{transcript}
+</user>
+"""
+
+
+def build_packed_prompt(system_prompt, items):
+    """items is a list of (id, transcript) pairs."""
+    blocks = "\n".join(
+        f'<transcript id="{item_id}">\n{transcript}\n</transcript>' for item_id, transcript in items
+    )
+    return f"""
+{system_prompt}
+{PACKED_INSTRUCTIONS}
+<user>
+{blocks}
+</user>
+"""
+
+
+def _extract_json(raw_text, opener, closer):
+    """Parse the outermost JSON value, tolerating code fences or stray prose."""
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", raw_text.strip())
+    start, end = text.find(opener), text.rfind(closer)
+    if start == -1 or end < start:
+        raise ValueError("No JSON found in model output")
+    return json.loads(text[start:end + 1])
+
+
+def is_valid_result(result):
+    if not isinstance(result, dict):
+        return False
+    return all(isinstance(result.get(key), (int, float)) for key in RESULT_KEYS)
+
+
+def validate_packed(raw_text, expected_ids):
+    """
+    Split a packed response into per-id results.
+
+    Returns (results, bad_ids): results for ids that came back well-formed,
+    and the ids that were missing, malformed, or repeated with different
+    content (identical repeats are accepted).
+    """
+    try:
+        parsed = _extract_json(raw_text, "[", "]")
+    except ValueError:
+        return {}, list(expected_ids)
+    if not isinstance(parsed, list):
+        return {}, list(expected_ids)
+
+    results = {}
+    conflicting = set()
+    for entry in parsed:
+        if not isinstance(entry, dict):
+            continue
+        item_id = str(entry.get("id"))
+        if item_id not in expected_ids:
+            continue
+        result = dict(entry)
+        result.pop("id", None)
+        if item_id in results:
+            if results[item_id] != result:
+                conflicting.add(item_id)
+        elif is_valid_result(entry):
+            results[item_id] = result
+        else:
+            # A malformed copy makes any other copy of the id ambiguous
+            conflicting.add(item_id)
+
+    for item_id in conflicting:
+        results.pop(item_id, None)
+    bad_ids = [item_id for item_id in expected_ids if item_id not in results]
+    return results, bad_ids
+
+
+class PackedGrader:
+    """
+    Grades many transcripts with as few model calls as the token limits allow.
+
+    invoke(prompt_text, max_tokens) must return (raw_text, usage, record) where
+    usage may carry "inputTokens"/"outputTokens" and record is the metrics
+    record for the call (None when uninstrumented); grade_pitch.invoke_nova fits.
+    Calls are tagged mode="packed"/"single" with the prompt version of what was
+    actually sent, so packed and single calls stay apart in metrics summaries.
+    """
+
+    def __init__(self, invoke=None, system_prompt=None, model_id="amazon.nova-lite-v1:0",
+                 max_pack_size=MAX_PACK_SIZE, use_pregrade=True):
+        if invoke is None or system_prompt is None:
+            from grade_pitch import SYSTEM_PROMPT, invoke_nova
+            invoke = invoke or (lambda text, max_tokens: invoke_nova(text, model_id=model_id, max_tokens=max_tokens))
+            system_prompt = system_prompt or SYSTEM_PROMPT
+
+        self.invoke = invoke
+        self.system_prompt = system_prompt
+        self.single_prompt_version = prompt_version(system_prompt)
+        self.packed_prompt_version = prompt_version(system_prompt + PACKED_INSTRUCTIONS)
+        self.max_pack_size = max_pack_size
+        self.pack_limit = max_pack_size
+        self.use_pregrade = use_pregrade
+        self.output_tokens_per_item = OUTPUT_TOKENS_PER_ITEM
+        self._clean_singles = 0
+        self._singles_per_regrow = SINGLES_PER_REGROW
+        self.stats = {
+            "transcripts": 0,
+            "graded_locally": 0,
+            "packed_calls": 0,
+            "single_calls": 0,
+            "regraded": 0,
+            "call_retries": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+        }
+
+    def _record_usage(self, usage, prompt_text, raw_text):
+        # Fall back to estimates when the model (or a stub) reports no usage
+        self.stats["input_tokens"] += usage.get("inputTokens", estimate_tokens(prompt_text))
+        self.stats["output_tokens"] += usage.get("outputTokens", estimate_tokens(raw_text))
+
+    def next_pack(self, pending):
+        """Take as many pending (id, transcript) pairs as fit in one call."""
+        by_output = int(MAX_OUTPUT_TOKENS * 0.9 // self.output_tokens_per_item)
+        limit = max(1, min(self.pack_limit, by_output))
+
+        budget = MAX_PACK_INPUT_TOKENS - estimate_tokens(self.system_prompt + PACKED_INSTRUCTIONS)
+        pack = []
+        for item_id, transcript in pending:
+            cost = estimate_tokens(transcript) + 10
+            if pack and (len(pack) >= limit or cost > budget):
+                break
+            pack.append((item_id, transcript))
+            budget -= cost
+        return pack
+
+    def grade_single(self, transcript):
+        prompt_text = build_single_prompt(self.system_prompt, transcript)
+        with tags(mode="single", items=1, prompt_version=self.single_prompt_version):
+            raw_text, usage, record = self.invoke(prompt_text, SINGLE_MAX_TOKENS)
+        self.stats["single_calls"] += 1
+        self._record_usage(usage, prompt_text, raw_text)
+        try:
+            result = _extract_json(raw_text, "{", "}")
+        except ValueError:
+            mark_parse_failure(record)
+            raise
+
+        # A run of good single calls means packing is worth trying again
+        if is_valid_result(result) and self.pack_limit < self.max_pack_size:
+            self._clean_singles += 1
+            if self._clean_singles >= self._singles_per_regrow:
+                self._clean_singles = 0
+                self.pack_limit += 1
+        return result
+
+    def _grade_pack(self, pack):
+        expected_ids = [item_id for item_id, _ in pack]
+        prompt_text = build_packed_prompt(self.system_prompt, pack)
+        max_tokens = min(MAX_OUTPUT_TOKENS, int(len(pack) * self.output_tokens_per_item * 1.5) + 100)
+
+        for attempt in range(CALL_RETRIES + 1):
+            try:
+                with tags(mode="packed", items=len(pack), prompt_version=self.packed_prompt_version):
+                    raw_text, usage, record = self.invoke(prompt_text, max_tokens)
+                break
+            except Exception as e:
+                if error_code(e) == "ValidationException":
+                    # Usually the packed prompt or output is too big for the model
+                    self._shrink(len(pack))
+                    raise
+                # A transport failure says nothing about the pack size
+                if not is_transient(e) or attempt == CALL_RETRIES:
+                    raise
+                self.stats["call_retries"] += 1
+                print(f"Packed call failed, retrying: {e}")
+                time.sleep(RETRY_BACKOFF * (2 ** attempt))
+        self.stats["packed_calls"] += 1
+        self._record_usage(usage, prompt_text, raw_text)
+
+        results, bad_ids = validate_packed(raw_text, expected_ids)
+        if bad_ids:
+            mark_parse_failure(record)
+
+        # Refine the per-item output estimate from what this call actually used
+        if results and usage.get("outputTokens"):
+            observed = usage["outputTokens"] / len(pack)
+            self.output_tokens_per_item = 0.7 * self.output_tokens_per_item + 0.3 * observed
+
+        # Halve the pack after a bad response, grow back slowly after clean ones
+        if len(bad_ids) > len(pack) // 4:
+            self._shrink(len(pack))
+        elif not bad_ids:
+            self.pack_limit = min(self.max_pack_size, self.pack_limit + 2)
+            self._singles_per_regrow = SINGLES_PER_REGROW
+
+        return results, bad_ids
+
+    def _shrink(self, pack_size):
+        self.pack_limit = max(1, pack_size // 2)
+        self._clean_singles = 0
+        if self.pack_limit == 1:
+            self._singles_per_regrow = min(MAX_SINGLES_PER_REGROW, self._singles_per_regrow * 2)
+
+    def grade_many(self, transcripts):
+        """
+        Grade a dict of {id: transcript} (or a list, ids become "0", "1", ...).
+
+        Returns {id: result}; an item that fails even on its single re-grade
+        maps to {"error": "..."}.
+        """
+        if not isinstance(transcripts, dict):
+            transcripts = {str(i): t for i, t in enumerate(transcripts)}
+        transcripts = {str(k): v for k, v in transcripts.items()}
+        self.stats["transcripts"] += len(transcripts)
+
+        results = {}
+        pending = []
+        for item_id, transcript in transcripts.items():
+            if self.use_pregrade:
+                decision = pregrade(transcript)
+                if decision["action"] == "local":
+                    results[item_id] = decision["result"]
+                    self.stats["graded_locally"] += 1
+                    continue
+            pending.append((item_id, transcript))
+
+        retry = []
+        while pending:
+            pack = self.next_pack(pending)
+            pending = pending[len(pack):]
+
+            if len(pack) == 1:
+                # Graded now so successful singles can grow the next pack
+                item_id = pack[0][0]
+                results[item_id] = self._grade_one(transcripts[item_id])
+                continue
+
+            try:
+                pack_results, bad_ids = self._grade_pack(pack)
+            except Exception as e:
+                print(f"Packed call failed: {e}")
+                pack_results, bad_ids = {}, [item_id for item_id, _ in pack]
+
+            results.update(pack_results)
+            retry.extend(bad_ids)
+            self.stats["regraded"] += len(bad_ids)
+
+        for item_id in retry:
+            results[item_id] = self._grade_one(transcripts[item_id])
+
+        return results
+
+    def _grade_one(self, transcript):
+        try:
+            result = self.grade_single(transcript)
+            return result if is_valid_result(result) else {"error": "Malformed model output"}
+        except Exception as e:
+            return {"error": str(e)}
@@ -0,0 +1,152 @@
+"""
+Local pre-grader for elevator pitch transcripts.
+
+Runs cheap checks (sentence segmentation, problem/solution/benefit cue
+detection, length and structure) before any Bedrock call. Only inputs that
+can't be a pitch at all (empty, or fewer than MIN_WORDS words) get a
+deterministic result without calling the model. Everything else goes to a
+model tier based on how confidently the structure was recognized, since a
+missing cue may just be phrasing the regexes don't know.
+"""
+
+import re
+
+# Model tiers, cheapest first
+MODEL_TIERS = {
+    "cheap": "amazon.nova-micro-v1:0",
+    "standard": "amazon.nova-lite-v1:0",
+}
+
+MIN_WORDS = 6                # Fewer words can't be graded as a pitch
+MAX_WORDS = 120              # A three-sentence pitch rarely runs longer
+CHEAP_TIER_CONFIDENCE = 0.8  # Structure confidence needed for the cheap tier
+
+# Cues are phrases, not single common words: "we", "app" or "help" alone show
+# up in any sentence, so they'd score small talk as a well-formed pitch
+PROBLEM_CUES = re.compile(
+    r"\b(problems?|struggl\w*|issues?|challeng\w*|difficult\w*|frustrat\w*|wast(?:e|es|ed|ing)|"
+    r"lack(?:s|ed|ing)? (?:of|the)|(?:can't|cannot|unable to) (?:\w+ )?(?:find|afford|keep|get|track|manage)|"
+    r"pain points?|time[- ]consuming|inefficien\w*|manual(?:ly)?|"
+    r"costs? (?:\w+ ){0,2}(?:hours|money|time|dollars|\$?\d)|too (?:much|many|long))\b",
+    re.IGNORECASE,
+)
+SOLUTION_CUES = re.compile(
+    r"\b((?:built|build|created?|developed?|designed|made|launched?|introduc\w*|wrote) (?:\w+ ){0,3}"
+    r"(?:app|tool|platform|script|system|service|product|device|website|program|bot|solution)s?|"
+    r"our (?:app|tool|platform|script|system|service|product|device|website|program|bot|solution)|"
+    r"automat\w*)\b",
+    re.IGNORECASE,
+)
+BENEFIT_CUES = re.compile(
+    r"\b(save[sd]?|saving|reduc\w*|improv\w*|increas\w*|faster|easier|so that|which means|"
+    r"helps? (?:\w+ ){0,2}(?:stay|save|reduce|get|find|manage|learn|avoid|keep)|"
+    r"(?:allow|enabl)\w* (?:\w+ ){0,2}to|\d+\s*(?:%|percent|hours?|minutes?|dollars?))\b",
+    re.IGNORECASE,
+)
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def segment_sentences(transcript):
+    """Split a transcript into non-empty sentences."""
+    text = " ".join((transcript or "").split())
+    if not text:
+        return []
+    return [s for s in SENTENCE_SPLIT.split(text) if re.search(r"\w", s)]
+
+
+def detect_cues(sentences):
+    """Index of the first sentence containing each cue type, or None."""
+    cues = {"problem": None, "solution": None, "benefit": None}
+    for index, sentence in enumerate(sentences):
+        for name, pattern in (("problem", PROBLEM_CUES), ("solution", SOLUTION_CUES), ("benefit", BENEFIT_CUES)):
+            if cues[name] is None and pattern.search(sentence):
+                cues[name] = index
+    return cues
+
+
+def _local_result(reason):
+    """Deterministic zero-score result in the grade_pitch JSON shape."""
+    return {
+        "problem_clarity_score": 0,
+        "solution_clarity_score": 0,
+        "benefit_score": 0,
+        "structure_score": 0,
+        "tone_score": 0,
+        "total_score": 0,
+        "reasoning_for_each_category": {
+            "problem_clarity": reason,
+            "solution_clarity": reason,
+            "benefit": reason,
+            "structure": reason,
+            "tone": reason,
+        },
+        "graded_locally": True,
+    }
+
+
+def structure_confidence(sentences, cues, word_count):
+    """
+    How confidently the transcript reads as a standard problem/solution/benefit pitch.
+
+    1.0 means three sentences with each cue present, in order, at a normal length.
+    """
+    found = [cues[name] for name in ("problem", "solution", "benefit") if cues[name] is not None]
+    confidence = len(found) / 3 * 0.6
+
+    if len(sentences) == 3:
+        confidence += 0.2
+    if len(found) == 3 and found == sorted(found) and len(set(found)) == 3:
+        confidence += 0.1
+    if MIN_WORDS * 2 <= word_count <= MAX_WORDS:
+        confidence += 0.1
+
+    return round(confidence, 2)
+
+
+def pregrade(transcript):
+    """
+    Decide how to grade a transcript.
+
+    Returns:
+        dict: {
+            "action": "local" | "model",
+            "result": dict or None,   (set when action is "local")
+            "model_id": str or None,  (set when action is "model")
+            "tier": "cheap" | "standard" | None,
+            "confidence": float,
+            "sentences": int,
+            "words": int,
+            "cues": {"problem": int|None, "solution": int|None, "benefit": int|None}
+        }
+    """
+    sentences = segment_sentences(transcript)
+    word_count = len(re.findall(r"\w+", transcript or ""))
+    cues = detect_cues(sentences)
+    confidence = structure_confidence(sentences, cues, word_count)
+
+    decision = {
+        "action": "model",
+        "result": None,
+        "model_id": None,
+        "tier": None,
+        "confidence": confidence,
+        "sentences": len(sentences),
+        "words": word_count,
+        "cues": cues,
+    }
+
+    reason = None
+    if word_count == 0:
+        reason = "No transcript was provided, so there was nothing to grade."
+    elif word_count < MIN_WORDS:
+        reason = f"The transcript has only {word_count} word(s), too short to contain a problem, solution and benefit."
+
+    if reason:
+        decision["action"] = "local"
+        decision["result"] = _local_result(reason)
+        return decision
+
+    decision["tier"] = "cheap" if confidence >= CHEAP_TIER_CONFIDENCE else "standard"
+    decision["model_id"] = MODEL_TIERS[decision["tier"]]
+    return decision
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Replay a transcript corpus through the local pre-grader.
+
+Reports the fraction of model calls avoided, the tier mix for the rest, and
+the latency saved versus sending every transcript to Nova Lite.
+
+Usage:
+    python replay_pregrade.py [corpus.jsonl|corpus.txt] [--live]
+        [--cheap-ms 600] [--standard-ms 1200]
+
+A .jsonl corpus needs a "transcript" field per line; any other file is read as
+one transcript per line. Without a corpus a small built-in sample is used.
+Without --live, model latency is taken from --cheap-ms/--standard-ms; with
+--live each routed transcript is graded through grade_pitch and timed. A tier
+with no live calls falls back to the assumed value, and the output says so.
+"""
+
+import argparse
+import json
+import time
+
+from pregrade import pregrade, MODEL_TIERS
+
+SAMPLE_CORPUS = [
+    "",
+    "um",
+    "Hello my name is Sam.",
+    "I like dogs and I have two of them at home with my family",
+    "College students struggle with time management. I built an app that organizes all assignments. It helps students stay on track and reduce stress.",
+    "Traffic congestion costs people hours daily. Our app finds optimal routes using real-time data. Users save 30 minutes per commute and reduce stress.",
+    "At my work we had to manually input sales info into our system. This led to a slow process. I created a script that input the data automatically saving 10 hours per week.",
+    "So basically there is this thing that happens sometimes and I think about it a lot, and then I talked to some people about it and we thought maybe something could be done, I don't know.",
+]
+
+
+def load_corpus(path):
+    with open(path, 'r') as f:
+        if path.endswith('.jsonl'):
+            return [json.loads(line)["transcript"] for line in f if line.strip()]
+        return [line.rstrip('\n') for line in f]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay transcripts through the local pre-grader")
+    parser.add_argument('corpus', nargs='?')
+    parser.add_argument('--live', action='store_true', help='call Bedrock for routed transcripts')
+    parser.add_argument('--cheap-ms', type=float, default=600, help='assumed cheap-tier latency')
+    parser.add_argument('--standard-ms', type=float, default=1200, help='assumed standard-tier latency')
+    args = parser.parse_args()
+
+    transcripts = load_corpus(args.corpus) if args.corpus else SAMPLE_CORPUS
+    tier_ms = {"cheap": [args.cheap_ms], "standard": [args.standard_ms]}
+    if args.live:
+        from grade_pitch import grade_pitch
+        tier_ms = {"cheap": [], "standard": []}
+
+    counts = {"local": 0, "cheap": 0, "standard": 0}
+    pregrade_seconds = 0.0
+
+    for transcript in transcripts:
+        start = time.perf_counter()
+        decision = pregrade(transcript)
+        pregrade_seconds += time.perf_counter() - start
+
+        if decision["action"] == "local":
+            counts["local"] += 1
+            continue
+
+        counts[decision["tier"]] += 1
+        if args.live:
+            start = time.perf_counter()
+            try:
+                grade_pitch(transcript, model_id=decision["model_id"])
+            except Exception as e:
+                print(f"Model call failed: {e}")
+            tier_ms[decision["tier"]].append((time.perf_counter() - start) * 1000)
+
+    def mean(values, fallback):
+        return sum(values) / len(values) if values else fallback
+
+    cheap_ms = mean(tier_ms["cheap"], args.cheap_ms)
+    standard_ms = mean(tier_ms["standard"], args.standard_ms)
+    # Without --live, or when --live made no calls on a tier, its latency is assumed
+    source = {tier: "measured" if args.live and tier_ms[tier] else "assumed" for tier in ("cheap", "standard")}
+
+    total = len(transcripts)
+    baseline_ms = total * standard_ms
+    routed_ms = counts["cheap"] * cheap_ms + counts["standard"] * standard_ms + pregrade_seconds * 1000
+
+    print("=== Pre-grader replay ===")
+    print(f"Transcripts:            {total}")
+    print(f"Graded locally:         {counts['local']} ({counts['local'] / total:.1%} of model calls avoided)")
+    print(f"Cheap tier ({MODEL_TIERS['cheap']}):     {counts['cheap']}")
+    print(f"Standard tier ({MODEL_TIERS['standard']}): {counts['standard']}")
+    print(f"Pre-grade time:         {pregrade_seconds * 1000 / total:.3f} ms/transcript")
+    print(f"Latency:                cheap {cheap_ms:.0f} ms ({source['cheap']}), "
+          f"standard {standard_ms:.0f} ms ({source['standard']})")
+    print(f"Total model latency:    {routed_ms / 1000:.2f}s vs {baseline_ms / 1000:.2f}s all-standard "
+          f"({(baseline_ms - routed_ms) / 1000:.2f}s saved, {(baseline_ms - routed_ms) / baseline_ms:.1%})")
+    if "assumed" in source.values():
+        print("Note: savings use assumed latencies (--cheap-ms/--standard-ms); run with --live to measure them")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,10 +27,21 @@ interface HandTrackingResult {
   hands_detected: boolean;
   movement_detected: boolean;
   details: string;
+  analyzed?: boolean;  // false when the service could not produce a verdict
 }
 
+// Total time we give the Python service, kept under the 60s function timeout
+const ANALYSIS_BUDGET_MS = 55000;
+const MAX_SHED_RETRIES = 3;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
 /**
  * Call external Python hand tracking service
+ *
+ * The service sheds load with 503 + Retry-After and answers 504 when our
+ * deadline can't be met. We retry 503s while the budget allows; anything
+ * that still fails is reported as "not analyzed", never as a verdict.
  */
 async function callPythonService(videoUrl: string): Promise<HandTrackingResult> {
   const serviceUrl = Deno.env.get('HAND_TRACKING_SERVICE_URL');
@@ -40,30 +51,69 @@ async function callPythonService(videoUrl: string): Promise<HandTrackingResult>
     return fallbackAnalysis();
   }
 
-  try {
-    const response = await fetch(serviceUrl, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({ video_url: videoUrl }),
-      signal: AbortSignal.timeout(60000), // 60 second timeout
-    });
-
-    if (!response.ok) {
-      console.error(`Python service error: ${response.status}`);
-      return fallbackAnalysis();
+  const deadline = Date.now() + ANALYSIS_BUDGET_MS;
+
+  for (let attempt = 0; ; attempt++) {
+    const remaining = deadline - Date.now();
+    if (remaining <= 0) {
+      return notAnalyzed('Hand tracking service did not respond in time');
     }
 
-    const result = await response.json();
-    return result as HandTrackingResult;
+    try {
+      const response = await fetch(serviceUrl, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        // Pass our remaining budget so the service stops work we'd discard
+        body: JSON.stringify({ video_url: videoUrl, deadline_ms: remaining }),
+        signal: AbortSignal.timeout(remaining + 5000),
+      });
+
+      if (response.status === 503 && attempt < MAX_SHED_RETRIES) {
+        await response.body?.cancel();
+        const retryAfterMs = (Number(response.headers.get('Retry-After')) || 1) * 1000;
+        if (Date.now() + retryAfterMs >= deadline) {
+          return notAnalyzed('Hand tracking service is busy');
+        }
+        console.log(`Hand tracking service busy, retrying in ${retryAfterMs}ms`);
+        await sleep(retryAfterMs);
+        continue;
+      }
 
-  } catch (error) {
-    console.error('Error calling Python service:', error);
-    return fallbackAnalysis();
+      if (!response.ok) {
+        console.error(`Python service error: ${response.status}`);
+        await response.body?.cancel();
+        return notAnalyzed(
+          response.status === 503 ? 'Hand tracking service is busy'
+            : response.status === 504 ? 'Hand tracking analysis timed out'
+            : `Hand tracking service error (${response.status})`
+        );
+      }
+
+      const result = await response.json();
+      return result as HandTrackingResult;
+
+    } catch (error) {
+      console.error('Error calling Python service:', error);
+      return notAnalyzed('Hand tracking service unavailable');
+    }
   }
 }
 
+/**
+ * Result used when the service was reached but produced no verdict
+ */
+function notAnalyzed(reason: string): HandTrackingResult {
+  return {
+    used_hands_effectively: false,
+    hands_detected: false,
+    movement_detected: false,
+    analyzed: false,
+    details: reason
+  };
+}
+
 /**
  * Fallback analysis when Python service is not available
  * Returns a default positive result for testing
@@ -82,6 +132,9 @@ function fallbackAnalysis(): HandTrackingResult {
  * Generate text feedback for students based on analysis
  */
 function generateFeedback(result: HandTrackingResult): string {
+  if (result.analyzed === false) {
+    return "Unable to evaluate hand use — analysis unavailable.";
+  }
   if (result.used_hands_effectively) {
     return "✓ Used hands effectively";
   } else {
@@ -2,26 +2,39 @@
 """
 Simple test script for AWS Bedrock Nova Lite model
 Tests elevator pitch grading using the system prompt from system_prompt.txt
+(or a candidate prompt file passed as the first argument)
+
+Usage: python test_nova_grading.py [prompt_file]
 """
 
 import boto3
 import json
+import sys
+from pregrade import pregrade
+from bedrock_metrics import instrument, prompt_version, mark_parse_failure, record_for, print_summary
 
-def load_system_prompt():
+def load_system_prompt(path='system_prompt.txt'):
     """Load the system prompt from system_prompt.txt"""
     try:
-        with open('system_prompt.txt', 'r') as f:
+        with open(path, 'r') as f:
             return f.read().strip()
     except FileNotFoundError:
-        print("Error: system_prompt.txt file not found!")
+        print(f"Error: {path} file not found!")
         print("Make sure the file exists in the current directory.")
         return None
 
-def call_nova_lite(system_prompt, user_transcript):
-    """Call AWS Bedrock Nova Lite model with system prompt and user transcript"""
+def call_nova_lite(system_prompt, user_transcript, model_id="amazon.nova-lite-v1:0"):
+    """
+    Call AWS Bedrock Nova Lite (or another Nova tier) with system prompt and user transcript.
+    Returns (response_text, metrics_record), or (None, None) on error.
+    """
     
-    # Initialize Bedrock client
-    client = boto3.client('bedrock-runtime', region_name='us-east-1')
+    # Initialize Bedrock client (instrumented for token/latency accounting)
+    client = instrument(
+        boto3.client('bedrock-runtime', region_name='us-east-1'),
+        rubric="elevator_pitch",
+        prompt_version=prompt_version(system_prompt),
+    )
     
     # Combine system prompt with user transcript for Nova Lite
     combined_prompt = f"{system_prompt}\n\nTranscript to evaluate:\n{user_transcript}"
@@ -29,7 +42,7 @@ def call_nova_lite(system_prompt, user_transcript):
     try:
         # Call Nova Lite model using Converse API (no system role support)
         response = client.converse(
-            modelId="amazon.nova-lite-v1:0",
+            modelId=model_id,
             messages=[
                 {
                     "role": "user",
@@ -45,24 +58,25 @@ def call_nova_lite(system_prompt, user_transcript):
         
         # Extract the response text
         response_text = response['output']['message']['content'][0]['text']
-        return response_text
+        return response_text, record_for(response)
         
     except Exception as e:
         print(f"Error calling Nova Lite: {e}")
-        return None
+        return None, None
 
 def main():
     """Main function to run the test"""
     print("=== AWS Bedrock Nova Lite Elevator Pitch Grader ===\n")
     
     # Load system prompt
-    print("Loading system prompt from system_prompt.txt...")
-    system_prompt = load_system_prompt()
+    prompt_file = sys.argv[1] if len(sys.argv) > 1 else 'system_prompt.txt'
+    print(f"Loading system prompt from {prompt_file}...")
+    system_prompt = load_system_prompt(prompt_file)
     
     if not system_prompt:
         return
     
-    print("✓ System prompt loaded successfully\n")
+    print(f"✓ System prompt loaded successfully (version {prompt_version(system_prompt)})\n")
     print("System prompt preview:")
     print("-" * 50)
     print(system_prompt[:200] + "..." if len(system_prompt) > 200 else system_prompt)
@@ -78,6 +92,8 @@ def main():
         user_input = input("Transcript: ").strip()
         
         if user_input.lower() in ['quit', 'exit', 'q']:
+            print("\n=== Session usage ===")
+            print_summary()
             print("Goodbye!")
             break
             
@@ -85,12 +101,18 @@ def main():
             print("Please enter a transcript.\n")
             continue
         
-        print("\n" + "="*60)
-        print("CALLING NOVA LITE MODEL...")
-        print("="*60)
+        # Pre-grade locally; degenerate transcripts never reach the model
+        decision = pregrade(user_input)
         
-        # Call Nova Lite
-        response = call_nova_lite(system_prompt, user_input)
+        print("\n" + "="*60)
+        if decision["action"] == "local":
+            print("GRADED LOCALLY (no model call)")
+            print("="*60)
+            response, record = json.dumps(decision["result"]), None
+        else:
+            print(f"CALLING {decision['model_id']} (confidence {decision['confidence']})...")
+            print("="*60)
+            response, record = call_nova_lite(system_prompt, user_input, model_id=decision["model_id"])
         
         if response:
             print("\n📊 GRADING RESPONSE:")
@@ -114,6 +136,7 @@ def main():
                         print("🔴 NEEDS WORK - focus on clarity and structure")
                         
             except json.JSONDecodeError:
+                mark_parse_failure(record)
                 print("Raw response (not valid JSON):")
                 print(response)
         else: